@@ -0,0 +1,249 @@
+"""
+Whole-graph statistics for degrees: connected components, their sizes,
+and eccentricity and diameter estimates, all from one pass of
+breadth-first sweeps over a CompactGraph.
+"""
+
+from array import array
+
+
+class ComponentIndex():
+    """
+    Connected component of every person, with per-component sizes and
+    double-sweep eccentricity estimates.
+
+    For each component, a sweep from an arbitrary member finds a far
+    person a, a sweep from a finds a far person b, and a sweep from b
+    finishes the pass. The distances from a and b bound every member's
+    eccentricity from below and above, and ecc(a) and ecc(b) are exact
+    lower bounds on the component's diameter (usually the diameter).
+
+    New people and links can be patched in (add_person, link): merged
+    components are tracked with union-find over component labels, and
+    their eccentricity estimates are dropped until the next full pass.
+    Removed links can split a component; split() checks for that with
+    searches that stop as soon as the two sides meet.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        size = len(graph)
+        self.labels = array("i", [-1]) * size
+        self.sizes = array("i")
+        self.diameters = array("i")
+
+        # Distances of each person from their component's a and b
+        self.from_a = array("i", [-1]) * size
+        self.from_b = array("i", [-1]) * size
+        self.ecc_a = array("i")
+        self.ecc_b = array("i")
+
+        for person in range(size):
+            if self.labels[person] == -1:
+                self._sweep_component(person)
+
+        # Union-find over labels, for components merged by link()
+        self.parents = array("i", range(len(self.sizes)))
+
+    def _sweep_component(self, start):
+        label = len(self.sizes)
+        members = self._bfs(start, self.from_b)
+        for member in members:
+            self.labels[member] = label
+        a = members[-1]
+        for member in members:
+            self.from_b[member] = -1
+
+        by_a = self._bfs(a, self.from_a)
+        b = by_a[-1]
+        self._bfs(b, self.from_b)
+
+        ecc_a = self.from_a[b]
+        ecc_b = max(self.from_b[member] for member in members)
+        self.sizes.append(len(members))
+        self.ecc_a.append(ecc_a)
+        self.ecc_b.append(ecc_b)
+        self.diameters.append(max(ecc_a, ecc_b))
+
+    def _bfs(self, start, distance):
+        """
+        Breadth-first search from person index `start`, writing
+        distances into `distance`. Returns the people reached, in order
+        of distance.
+        """
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+
+        distance[start] = 0
+        order = [start]
+        i = 0
+        while i < len(order):
+            person = order[i]
+            i += 1
+            depth = distance[person] + 1
+            for j in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[j]
+                for k in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[k]
+                    if distance[neighbor] == -1:
+                        distance[neighbor] = depth
+                        order.append(neighbor)
+        return order
+
+    def add_person(self):
+        """
+        Records a person just added to the graph, alone in a component.
+        """
+        label = len(self.sizes)
+        self.labels.append(label)
+        self.parents.append(label)
+        self.sizes.append(1)
+        self.diameters.append(0)
+        self.ecc_a.append(0)
+        self.ecc_b.append(0)
+        self.from_a.append(0)
+        self.from_b.append(0)
+
+    def link(self, person, other):
+        """
+        Records that person indexes `person` and `other` are now linked.
+        """
+        first = self._find(self.labels[person])
+        second = self._find(self.labels[other])
+        if first != second:
+            if self.sizes[first] < self.sizes[second]:
+                first, second = second, first
+            self.parents[second] = first
+            self.sizes[first] += self.sizes[second]
+        # New links shorten distances, so the estimates no longer hold
+        self.diameters[first] = -1
+
+    def split(self, people):
+        """
+        Records that links were removed between person indexes in
+        `people` and the rest of their components. People still sharing
+        a label are searched from in pairs, and any part found cut off is
+        given a new label, so a search costs about as much as the
+        smaller side rather than the whole component.
+        """
+        unchecked = list(dict.fromkeys(people))
+        while len(unchecked) > 1:
+            anchor = unchecked.pop()
+            # People in a different component from the anchor, who may
+            # still need telling apart from each other
+            apart = []
+            for other in unchecked:
+                label = self._find(self.labels[anchor])
+                if label == self._find(self.labels[other]):
+                    piece = self._cut_off(anchor, other)
+                    if piece is None:
+                        continue
+                    self._relabel(piece, label)
+                apart.append(other)
+            unchecked = apart
+
+        # Removed links lengthen distances, so the estimates no longer hold
+        for person in people:
+            self.diameters[self._find(self.labels[person])] = -1
+
+    def _cut_off(self, first, second):
+        """
+        Searches from person indexes `first` and `second` at once, a
+        layer of the smaller side at a time. Returns None if they meet,
+        or else the set of everyone connected to the side that ran out.
+
+        Rows are read with movies_of and stars_of, which see link edits
+        not yet packed into the graph's arrays, so no repack is forced.
+        """
+        movies_of = self.graph.movies_of
+        stars_of = self.graph.stars_of
+
+        reached = [{first}, {second}]
+        layers = [[first], [second]]
+        while True:
+            side = 0 if len(layers[0]) <= len(layers[1]) else 1
+            if not layers[side]:
+                return reached[side]
+            mine, theirs = reached[side], reached[1 - side]
+            next_layer = []
+            for person in layers[side]:
+                for movie in movies_of(person):
+                    for neighbor in stars_of(movie):
+                        if neighbor in theirs:
+                            return None
+                        if neighbor not in mine:
+                            mine.add(neighbor)
+                            next_layer.append(neighbor)
+            layers[side] = next_layer
+
+    def _relabel(self, piece, label):
+        """
+        Moves the people in `piece`, cut off from component `label`,
+        into a component of their own.
+        """
+        new_label = len(self.sizes)
+        for person in piece:
+            self.labels[person] = new_label
+        self.parents.append(new_label)
+        self.sizes.append(len(piece))
+        self.sizes[label] -= len(piece)
+        self.diameters.append(-1)
+        self.ecc_a.append(0)
+        self.ecc_b.append(0)
+
+    def _find(self, label):
+        parents = self.parents
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return label
+
+    def component(self, person_id):
+        """Returns the component label of a person."""
+        return self._find(self.labels[self.graph.person_index[person_id]])
+
+    def connected(self, source, target):
+        """
+        Returns whether person ids `source` and `target` are connected.
+        """
+        return self.component(source) == self.component(target)
+
+    def component_size(self, person_id):
+        """Returns the number of people in a person's component."""
+        return self.sizes[self.component(person_id)]
+
+    def eccentricity_bounds(self, person_id):
+        """
+        Returns (lower, upper) bounds on the greatest degrees of
+        separation between a person and anyone they are connected to,
+        or None if links added since the last full pass changed them.
+        """
+        person = self.graph.person_index[person_id]
+        label = self._find(self.labels[person])
+        if self.diameters[label] == -1:
+            return None
+        from_a = self.from_a[person]
+        from_b = self.from_b[person]
+        return (max(from_a, from_b),
+                min(from_a + self.ecc_a[label], from_b + self.ecc_b[label]))
+
+    def summary(self):
+        """
+        Returns a dictionary of headline statistics for the whole graph.
+        """
+        roots = [label for label in range(len(self.sizes))
+                 if self.parents[label] == label]
+        if not roots:
+            return {"people": 0, "components": 0}
+        largest = max(roots, key=self.sizes.__getitem__)
+        return {
+            "people": len(self.labels),
+            "components": len(roots),
+            "isolated": sum(1 for label in roots if self.sizes[label] == 1),
+            "largest_component": self.sizes[largest],
+            "largest_component_diameter": self.diameters[largest],
+            "max_diameter": max(self.diameters[label] for label in roots),
+        }
@@ -0,0 +1,115 @@
+"""
+Batch mode for degrees: loads the data once, then answers a stream of
+`source,target` name pairs, writing one JSON object per line.
+
+Usage: python batch.py [-w workers] directory [queries.csv]
+
+Queries are read from stdin when no file is given. With more than one
+worker, queries are spread over a process pool; workers share the
+memory-mapped snapshot (and, where fork is available, inherit the graph
+already loaded by the parent).
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+
+def answer(source_name, target_name):
+    """
+    Returns a JSON-serializable result for one query.
+    """
+    result = {"source": source_name, "target": target_name}
+    ids = []
+    for name in (source_name, target_name):
+        person_ids = degrees.person_ids_for_name(name)
+        if len(person_ids) != 1:
+            result["error"] = (f"Person not found: {name}" if not person_ids
+                               else f"Ambiguous name: {name}")
+            return result
+        ids.append(next(iter(person_ids)))
+
+    path = degrees.shortest_path(*ids, bidirectional=True)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [[movie_id, person_id] for movie_id, person_id in path]
+    return result
+
+
+def answer_row(row):
+    """
+    Answers a parsed CSV row, reporting malformed rows as errors.
+    """
+    if len(row) != 2:
+        return {"error": f"Expected source,target: {','.join(row)}"}
+    return answer(row[0].strip(), row[1].strip())
+
+
+def run(rows, out, directory, workers=1, chunksize=16):
+    """
+    Answers every row of `rows`, writing JSON lines to `out` in order.
+
+    Workers are sent `chunksize` rows at a time; a live stream should use
+    1, so that no query waits for later ones to arrive.
+    """
+    rows = (row for row in rows if row)
+    if workers == 1:
+        for result in map(answer_row, rows):
+            _write(out, result)
+        return
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "fork" if "fork" in methods else None
+    )
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(directory,)) as pool:
+        for result in pool.imap(answer_row, rows, chunksize):
+            _write(out, result)
+
+
+def _init_worker(directory):
+    """
+    Makes sure a pool worker has the graph loaded.
+    """
+    if degrees.graph is None:
+        degrees.load_data(directory, snapshot=True)
+
+
+def _write(out, result):
+    out.write(json.dumps(result) + "\n")
+    out.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer degrees queries "
+                                     "in bulk as JSON lines.")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("directory")
+    parser.add_argument("queries", nargs="?",
+                        help="CSV file of source,target names")
+    args = parser.parse_args()
+    if args.workers < 1:
+        sys.exit("Need at least one worker")
+
+    degrees.load_data(args.directory, snapshot=True, workers=args.workers,
+                      analyze=True)
+
+    if args.queries is None:
+        run(csv.reader(sys.stdin), sys.stdout, args.directory, args.workers,
+            chunksize=1)
+    else:
+        with open(args.queries, encoding="utf-8", newline="") as f:
+            run(csv.reader(f), sys.stdout, args.directory, args.workers)
+
+
+if __name__ == "__main__":
+    main()
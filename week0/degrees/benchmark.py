@@ -0,0 +1,233 @@
+"""
+Benchmark harness for degrees loading and searching.
+
+Generates a synthetic people/movies/stars dataset of the requested size
+(or uses an existing data directory), then times loading in every mode,
+single-query latency percentiles for each search implementation
+(including degrees2.py), top-k paths and batch throughput. Results are
+printed as JSON.
+
+Usage: python benchmark.py [--edges N] [--queries N] [--workers N]
+                           [--directory DIR] [--output FILE]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import batch
+import degrees
+import degrees2
+import loader
+import snapshot
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "vo", "sha", "el", "dor", "an",
+             "bri", "cu", "fe", "gil", "ho", "jun", "ne", "pa", "qui", "zu"]
+
+
+def generate(directory, edges, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv with about `edges` star
+    links into `directory`. Casts average five people, and popular
+    people appear in many more movies than most, as in the IMDB data.
+    """
+    rng = random.Random(seed)
+    people = max(edges // 3, 2)
+    movies = max(edges // 5, 1)
+
+    def name():
+        return " ".join(
+            "".join(rng.choice(SYLLABLES)
+                    for _ in range(rng.randint(1, 3))).title()
+            for _ in range(2)
+        )
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(people):
+            writer.writerow([i + 1, name(), rng.randint(1920, 2005)])
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(movies):
+            writer.writerow([i + 1, name(), rng.randint(1950, 2020)])
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        f.write("person_id,movie_id\n")
+        for _ in range(edges):
+            # Squaring skews picks towards low ids: a few prolific stars
+            person = int(people * rng.random() ** 2) + 1
+            f.write(f"{person},{rng.randint(1, movies)}\n")
+
+
+def reset(module):
+    """Forgets any data loaded into a degrees module."""
+    module.names.clear()
+    module.people.clear()
+    module.movies.clear()
+    if hasattr(module, "graph"):
+        module.graph = None
+        module.components = None
+        module.distance_index.cache_clear()
+        module.name_index.cache_clear()
+
+
+def timed(function, *args, **kwargs):
+    """Returns the seconds taken by one call of `function`."""
+    started = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def latency(function, pairs):
+    """
+    Returns latency percentiles, in milliseconds, of calling
+    `function(source, target)` for every pair.
+    """
+    samples = []
+    for source, target in pairs:
+        started = time.perf_counter()
+        function(source, target)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "queries": len(samples),
+        "p50_ms": _percentile(samples, 50),
+        "p90_ms": _percentile(samples, 90),
+        "p99_ms": _percentile(samples, 99),
+        "mean_ms": statistics.fmean(samples),
+    }
+
+
+def _percentile(samples, percent):
+    index = min(len(samples) - 1, round(percent / 100 * (len(samples) - 1)))
+    return samples[index]
+
+
+def benchmark_loading(directory, workers):
+    results = {}
+    reset(degrees)
+    results["dicts_s"] = timed(degrees.load_data, directory)
+    reset(degrees)
+    results["degrees2_dicts_s"] = timed(degrees2.load_data, directory)
+    reset(degrees2)
+    for count in sorted({1, workers}):
+        reset(degrees)
+        results[f"compact_{count}_workers_s"] = timed(
+            degrees.load_data, directory, compact=True, workers=count)
+    reset(degrees)
+    if os.path.exists(snapshot.path_for(directory)):
+        os.remove(snapshot.path_for(directory))
+    results["snapshot_build_s"] = timed(
+        degrees.load_data, directory, snapshot=True, workers=workers)
+    reset(degrees)
+    results["snapshot_load_s"] = timed(
+        degrees.load_data, directory, snapshot=True)
+    results["analyze_s"] = timed(degrees.analyze_graph)
+    return results
+
+
+def benchmark_queries(directory, queries, workers, seed):
+    rng = random.Random(seed)
+
+    # Dict-based searches, including degrees2.py
+    reset(degrees)
+    degrees.load_data(directory)
+    person_ids = list(degrees.people)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids))
+             for _ in range(queries)]
+    results = {
+        "degrees_bfs": latency(degrees.shortest_path, pairs),
+        "degrees_bidirectional": latency(
+            lambda source, target: degrees.shortest_path(
+                source, target, bidirectional=True), pairs),
+    }
+    degrees2.load_data(directory)
+    results["degrees2_bfs"] = latency(degrees2.shortest_path, pairs)
+    reset(degrees2)
+
+    # Array-backed searches
+    reset(degrees)
+    degrees.load_data(directory, snapshot=True, analyze=True)
+    graph = degrees.graph
+    results["compact_bfs"] = latency(
+        lambda source, target: graph.shortest_path(source, target, False),
+        pairs)
+    results["compact_bidirectional"] = latency(
+        lambda source, target: graph.shortest_path(source, target, True),
+        pairs)
+    # Both searches through degrees.shortest_path, which answers pairs in
+    # different components from the component index without searching
+    results["compact_bfs_with_components"] = latency(
+        degrees.shortest_path, pairs)
+    results["compact_bidirectional_with_components"] = latency(
+        lambda source, target: degrees.shortest_path(
+            source, target, bidirectional=True), pairs)
+    results["top_5_paths"] = latency(
+        lambda source, target: degrees.shortest_paths(source, target, 5),
+        pairs)
+    results["distance_index"] = latency(
+        lambda source, target: degrees.distance_index(source).path_to(target),
+        pairs)
+
+    # Batch throughput through batch.py, by name
+    rows = [[degrees.person_record(source)["name"],
+             degrees.person_record(target)["name"]] for source, target in pairs]
+    for count in sorted({1, workers}):
+        started = time.perf_counter()
+        batch.run(rows, io.StringIO(), directory, count)
+        seconds = time.perf_counter() - started
+        results[f"batch_{count}_workers_qps"] = len(rows) / seconds
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees.")
+    parser.add_argument("--edges", type=int, default=10000,
+                        help="star links in the synthetic dataset")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory",
+                        help="benchmark an existing data directory instead")
+    parser.add_argument("--output", help="write JSON here, not stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.directory
+        report = {"workers": args.workers, "queries": args.queries}
+        if directory is None:
+            directory = scratch
+            report["generate_s"] = timed(generate, directory, args.edges,
+                                         args.seed)
+            report["edges"] = args.edges
+        report["directory"] = args.directory
+        report["memory_before_mb"] = loader.memory_usage() / 2 ** 20
+        report["loading"] = benchmark_loading(directory, args.workers)
+        report["search"] = benchmark_queries(directory, args.queries,
+                                             args.workers, args.seed)
+        report["memory_after_mb"] = loader.memory_usage() / 2 ** 20
+        report["graph"] = degrees.components.summary()
+        if args.directory is None:
+            reset(degrees)
+
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Microbenchmark of the list-backed frontiers against the indexed ones.
+
+Usage: python benchmark_frontier.py [size]
+"""
+
+import sys
+import timeit
+
+from util import (Node, StackFrontier, QueueFrontier, IndexedStackFrontier,
+                  IndexedQueueFrontier, PriorityFrontier)
+
+
+def workload(frontier_class, size):
+    """
+    Mimics a breadth-first search: add `size` nodes, checking membership
+    before each add, then drain the frontier.
+    """
+    frontier = frontier_class()
+    for i in range(size):
+        if not frontier.contains_state(i):
+            frontier.add(Node(state=i, parent=None, action=None))
+    while not frontier.empty():
+        frontier.remove()
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark_frontier.py [size]")
+    size = int(sys.argv[1]) if len(sys.argv) == 2 else 5000
+
+    classes = [StackFrontier, QueueFrontier, IndexedStackFrontier,
+               IndexedQueueFrontier, PriorityFrontier]
+    for frontier_class in classes:
+        seconds = min(timeit.repeat(
+            lambda: workload(frontier_class, size), number=1, repeat=3
+        ))
+        print(f"{frontier_class.__name__:>22}: {seconds * 1000:9.2f} ms "
+              f"for {size} nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 import csv
+import functools
+import os
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+import loader
+import snapshot as snapshots
+from analytics import ComponentIndex
+from graph import CompactGraph, DistanceIndex
+from nameindex import NameIndex
+from util import Node, IndexedQueueFrontier, SearchStats, path_to
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +20,94 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Array-backed adjacency of people and movies, built when loading with
+# compact=True (see graph.CompactGraph)
+graph = None
 
-def load_data(directory):
+# Connected components and eccentricity estimates, built when loading
+# with analyze=True (see analytics.ComponentIndex)
+components = None
+
+# How many sources keep a cached DistanceIndex (see distance_index)
+DISTANCE_CACHE_SIZE = 32
+
+# Where and how the data was loaded, the [size, mtime_ns] and last
+# bytes of each CSV file at the time, so that refresh can pick up
+# appended rows, and whether the data was edited since (see _edited)
+data_source = None
+
+
+def load_data(directory, compact=False, snapshot=False, workers=1,
+              analyze=False, index_names=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is True, the files are streamed into a CompactGraph
+    (see loader.load_graph) instead, which carries all of the data and
+    leaves `names`, `people` and `movies` empty.
+
+    If `snapshot` is True, the compact graph is memory-mapped from a
+    binary snapshot in `directory`, (re)building it first when it is
+    missing or older than the CSV files.
+
+    Compact loads parse the files in up to `workers` processes.
+
+    If `analyze` is True, connected components are computed up front
+    (see analyze_graph), so that searches between unconnected people
+    return immediately.
+
+    If `index_names` is True, the NameIndex behind find_people is built
+    up front too, rather than by the first lookup.
     """
+    global graph, components, data_source
+
+    # Start from nothing, so no earlier load or mode leaves data behind
+    names.clear()
+    people.clear()
+    movies.clear()
+    graph = None
+    distance_index.cache_clear()
+    name_index.cache_clear()
+    components = None
+
+    stamps = snapshots.stamps(directory)
+    tails = _tails(directory, stamps)
+    _load(directory, compact, snapshot, workers)
+    data_source = {
+        "directory": directory,
+        "options": {"compact": compact, "snapshot": snapshot,
+                    "workers": workers, "analyze": analyze,
+                    "index_names": index_names},
+        "stamps": stamps,
+        "tails": tails,
+        "edited": False,
+    }
+    if analyze:
+        analyze_graph()
+    if index_names:
+        name_index()
+
+
+def _load(directory, compact, snapshot, workers):
+    global graph
+
+    if snapshot:
+        graph = snapshots.load(directory)
+        if graph is not None:
+            return
+        _load(directory, True, False, workers)
+        try:
+            snapshots.save(directory, graph)
+        except OSError:
+            # Read-only data directory: keep the in-memory graph
+            return
+        graph = snapshots.load(directory)
+        return
+
+    if compact:
+        graph = loader.load_graph(directory, workers)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -59,8 +150,11 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    memory = loader.memory_usage()
+    load_data(directory, snapshot=True, workers=os.cpu_count() or 1)
     print("Data loaded.")
+    print(f"Memory: {memory / 2 ** 20:.1f} MB before, "
+          f"{loader.memory_usage() / 2 ** 20:.1f} MB after loading.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -78,60 +172,165 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_record(path[i][1])["name"]
+            person2 = person_record(path[i + 1][1])["name"]
+            movie = movie_record(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True, searches from both ends at once
+    (see bidirectional_search). If `stats` (a util.SearchStats) is given,
+    the nodes expanded and time taken are added to it.
+
+    If no possible path, returns None.
+    """
+    if stats is None:
+        stats = SearchStats()
+    started = time.perf_counter()
+    try:
+        index = component_index()
+        if index is not None and not index.connected(source, target):
+            return None
+        if graph is not None:
+            return graph.shortest_path(source, target, bidirectional, stats)
+        if bidirectional:
+            return bidirectional_search(source, target, stats)
+        return breadth_first_search(source, target, stats)
+    finally:
+        stats.searches += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def breadth_first_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from the source and stopping at the first neighbour that is the
+    target.
+
     If no possible path, returns None.
     """
+    if source == target:
+        return []
 
     # Initialize frontier
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
 
     # Initialize an empty explored set
     explored = set()
-    iteration = 0
-    # Keep looping until path is found
-    while True:
-        iteration += 1
-        
+    expanded = 0
+    try:
+        # Keep looping until path is found
+        while not frontier.empty():
+            node = frontier.remove()
+            explored.add(node.state)
+            expanded += 1
+
+            # Neighbours are generated lazily, so a hit on the target
+            # ends the search without building the rest of them
+            for movie, person in iter_neighbors(node.state):
+                if person == target:
+                    return path_to(Node(person, node, movie))
+                if (not frontier.contains_state(person)
+                        and person not in explored):
+                    frontier.add(Node(person, node, movie))
+
         # If nothing left in frontier, then no path
-        if frontier.empty():
-            return None
-        
-        # Choose a node from the frontier
-        node = frontier.remove()
-
-        explored.add(node.state)
-
-        # Add neigbors to frontier!!
-        # Neighbors for person returns a set of tuples
-        # for the given movie actor id. [0] is the movie
-        # they both starred in, [1] the actor id.
-        for movie, person in neighbors_for_person(node.state):
-            if person == target:
-                print(iteration)
-                path = [(movie, person)]
-                while node.parent != None:
-                    path.insert(0, (node.action, node.state))
-                    node = node.parent
-                return(path)
-            
-            if not frontier.contains_state(person) and person not in explored:
-                child = Node(person, node, movie)
-                frontier.add(child)
-            
-        
+        return None
+    finally:
+        if stats is not None:
+            stats.nodes_expanded += expanded
+
+
+def bidirectional_search(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one breadth-first
+    frontier from the source and one from the target until they meet.
+
+    Each step expands a whole layer of whichever frontier is smaller,
+    so the number of people explored stays around the square root of
+    what a one-sided search needs on a densely connected graph.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step that
+    # leads back towards the source (forward) or the target (backward)
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
 
+    while forward_layer and backward_layer:
+
+        # Always grow the cheaper side
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = _expand_layer(
+                forward_layer, forward, backward, stats)
+        else:
+            backward_layer, meeting = _expand_layer(
+                backward_layer, backward, forward, stats)
+
+        if meeting is not None:
+            return _join_paths(meeting, forward, backward)
+
+    return None
+
+
+def _expand_layer(layer, parents, other_parents, stats=None):
+    """
+    Expands every person in `layer` by one step, recording parents.
+
+    Returns the next layer and a person already reached by the other
+    side, or None if the frontiers have not met yet.
+    """
+    next_layer = []
+    for expanded, person_id in enumerate(layer, 1):
+        for movie_id, neighbor in iter_neighbors(person_id):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie_id, person_id)
+            if neighbor in other_parents:
+                if stats is not None:
+                    stats.nodes_expanded += expanded
+                return next_layer, neighbor
+            next_layer.append(neighbor)
+    if stats is not None:
+        stats.nodes_expanded += len(layer)
+    return next_layer, None
+
+
+def _join_paths(meeting, forward, backward):
+    """
+    Builds the (movie_id, person_id) path through `meeting` from the
+    parent maps of a bidirectional search.
+    """
+    # Walk back from the meeting point to the source
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, previous = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+
+    # Walk on from the meeting point to the target
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, following = backward[person_id]
+        path.append((movie_id, following))
+        person_id = following
+    return path
 
 
 def person_id_for_name(name):
@@ -139,13 +338,13 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = list(person_ids_for_name(name))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_record(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -160,17 +359,395 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+@functools.lru_cache(maxsize=DISTANCE_CACHE_SIZE)
+def distance_index(source):
+    """
+    Returns a DistanceIndex of everyone's distance from person id `source`
+    (e.g. Bacon numbers), built with a single breadth-first search.
+
+    Indexes for the most recently used sources are kept in an LRU cache.
+    """
+    return DistanceIndex(compact_graph(), source)
+
+
+def shortest_paths(source, target, k=5):
+    """
+    Returns up to `k` shortest lists of (movie_id, person_id) pairs
+    that connect the source to the target, each through a different
+    chain of people, found with a single breadth-first search.
+
+    Returns an empty list if they are not connected.
+    """
+    index = component_index()
+    if index is not None and not index.connected(source, target):
+        return []
+    return compact_graph().shortest_paths(source, target, k)
+
+
+def analyze_graph():
+    """
+    Computes the connected component of everyone, with component sizes
+    and eccentricity estimates, and returns the ComponentIndex.
+    """
+    global components
+
+    components = ComponentIndex(compact_graph())
+    return components
+
+
+def component_index():
+    """
+    Returns the ComponentIndex, or None if the graph was not analyzed,
+    computing it again first if edits to `people` and `movies` have
+    left it behind.
+    """
+    if components is not None and components.graph is not graph:
+        analyze_graph()
+    return components
+
+
+def compact_graph():
+    """
+    Returns the CompactGraph, packing it from `people` and `movies`
+    first if the data was loaded into dicts.
+    """
+    global graph
+
+    if graph is None:
+        graph = CompactGraph.from_dicts(people, movies)
+    return graph
+
+
+@functools.lru_cache(maxsize=None)
+def name_index():
+    """
+    Returns the NameIndex over everyone loaded, built by load_data with
+    index_names=True or else on first use, and again after an edit.
+    """
+    if graph is not None and graph.person_names is not None:
+        offsets = graph.person_offsets
+        person_names = graph.person_names
+        if graph.removed_people:
+            person_names = [
+                "" if person in graph.removed_people else name
+                for person, name in enumerate(person_names)
+            ]
+        return NameIndex(
+            person_names,
+            (offsets[i + 1] - offsets[i] for i in range(len(graph))),
+            graph.person_ids
+        )
+    person_ids = list(people)
+    return NameIndex(
+        [people[person_id]["name"] for person_id in person_ids],
+        (len(people[person_id]["movies"]) for person_id in person_ids),
+        person_ids
+    )
+
+
+def find_people(query, limit=10):
+    """
+    Returns up to `limit` person ids whose names start with, contain
+    words starting with, or nearly match `query`, most films first.
+    """
+    return name_index().search(query, limit)
+
+
+def person_ids_for_name(name):
+    """
+    Returns the set of person ids with the given name, ignoring case.
+    """
+    if not names and graph is not None and graph.person_names is not None:
+        return graph.people_named(name)
+    return names.get(name.lower(), set())
+
+
+def person_record(person_id):
+    """
+    Returns a dictionary with the name and birth of a person.
+    """
+    if person_id in people:
+        return people[person_id]
+    person = graph.person_index[person_id]
+    return {
+        "name": graph.person_names[person],
+        "birth": graph.person_births[person]
+    }
+
+
+def movie_record(movie_id):
+    """
+    Returns a dictionary with the title and year of a movie.
+    """
+    if movie_id in movies:
+        return movies[movie_id]
+    movie = graph.movie_index[movie_id]
+    return {
+        "title": graph.movie_titles[movie],
+        "year": graph.movie_years[movie]
+    }
+
+
+def add_person(person_id, name, birth=""):
+    """
+    Adds a person to the loaded data, without reloading.
+    """
+    _add_person(person_id, name, birth)
+    _edited()
+
+
+def add_movie(movie_id, title, year=""):
+    """
+    Adds a movie to the loaded data, without reloading.
+    """
+    _add_movie(movie_id, title, year)
+    _edited()
+
+
+def add_star(person_id, movie_id):
+    """
+    Records that a loaded person starred in a loaded movie.
+    """
+    _add_stars([(person_id, movie_id)])
+    _edited()
+
+
+def remove_star(person_id, movie_id):
+    """
+    Removes the record of a person starring in a movie.
+    """
+    if _uses_dicts():
+        people[person_id]["movies"].discard(movie_id)
+        movies[movie_id]["stars"].discard(person_id)
+    else:
+        links = [(graph.person_index[person_id], graph.movie_index[movie_id])]
+        graph.update_links(removed=links)
+        _split(links)
+    _edited()
+
+
+def remove_person(person_id):
+    """
+    Removes a person and every record of them starring in a movie.
+    """
+    if _uses_dicts():
+        person = people.pop(person_id)
+        for movie_id in person["movies"]:
+            movies[movie_id]["stars"].discard(person_id)
+        same_name = names[person["name"].lower()]
+        same_name.discard(person_id)
+        if not same_name:
+            del names[person["name"].lower()]
+    else:
+        _split(graph.remove_person(person_id))
+    _edited()
+
+
+def remove_movie(movie_id):
+    """
+    Removes a movie and every record of anyone starring in it.
+    """
+    if _uses_dicts():
+        for person_id in movies.pop(movie_id)["stars"]:
+            people[person_id]["movies"].discard(movie_id)
+    else:
+        _split(graph.remove_movie(movie_id))
+    _edited()
+
+
+def refresh():
+    """
+    Applies rows appended to the CSV files since they were loaded,
+    without reloading the rest, and brings the snapshot up to date if
+    the data came from one and has not been edited through this module
+    since. Falls back to a full reload if a file shrank, changed without
+    growing, or no longer ends its old length with the same bytes (see
+    loader.tail), as when it is rewritten.
+
+    Returns the number of people, movies and stars added.
+    """
+    if data_source is None:
+        raise Exception("no data loaded")
+    directory = data_source["directory"]
+    old = data_source["stamps"]
+    new = snapshots.stamps(directory)
+    tails = _tails(directory, old)
+    if any(new[name][0] < old[name][0]
+           or (new[name][0] == old[name][0] and new[name] != old[name])
+           or tails[name] != data_source["tails"][name]
+           for name in new):
+        load_data(directory, **data_source["options"])
+        return None
+
+    added = {"people": 0, "movies": 0, "stars": 0}
+    for row in loader.rows_after(f"{directory}/people.csv",
+                                 old["people.csv"][0]):
+        if not _has_person(row["id"]):
+            _add_person(row["id"], row["name"], row["birth"])
+            added["people"] += 1
+    for row in loader.rows_after(f"{directory}/movies.csv",
+                                 old["movies.csv"][0]):
+        if not _has_movie(row["id"]):
+            _add_movie(row["id"], row["title"], row["year"])
+            added["movies"] += 1
+    links = [
+        (row["person_id"], row["movie_id"])
+        for row in loader.rows_after(f"{directory}/stars.csv",
+                                     old["stars.csv"][0])
+        if _has_person(row["person_id"]) and _has_movie(row["movie_id"])
+    ]
+    _add_stars(links)
+    added["stars"] = len(links)
+    _changed()
+
+    data_source["stamps"] = new
+    data_source["tails"] = _tails(directory, new)
+    if data_source["options"]["snapshot"] and not data_source["edited"]:
+        try:
+            snapshots.save(directory, graph)
+        except OSError:
+            pass
+    return added
+
+
+def _tails(directory, stamps):
+    """
+    Returns the last bytes of each CSV file before the size in `stamps`.
+    """
+    return {name: loader.tail(os.path.join(directory, name), size)
+            for name, (size, _) in stamps.items()}
+
+
+def _uses_dicts():
+    """
+    Returns whether `people` and `movies` hold the data, rather than a
+    CompactGraph (any graph packed from the dicts is then a cache).
+    """
+    return graph is None or graph.person_names is None
+
+
+def _has_person(person_id):
+    if _uses_dicts():
+        return person_id in people
+    return person_id in graph.person_index
+
+
+def _has_movie(movie_id):
+    if _uses_dicts():
+        return movie_id in movies
+    return movie_id in graph.movie_index
+
+
+def _add_person(person_id, name, birth):
+    if _has_person(person_id):
+        raise ValueError(f"person {person_id} is already loaded")
+    if _uses_dicts():
+        people[person_id] = {"name": name, "birth": birth, "movies": set()}
+        names.setdefault(name.lower(), set()).add(person_id)
+    else:
+        graph.add_person(person_id, name, birth)
+        if components is not None:
+            components.add_person()
+
+
+def _add_movie(movie_id, title, year):
+    if _has_movie(movie_id):
+        raise ValueError(f"movie {movie_id} is already loaded")
+    if _uses_dicts():
+        movies[movie_id] = {"title": title, "year": year, "stars": set()}
+    else:
+        graph.add_movie(movie_id, title, year)
+
+
+def _add_stars(links):
+    """
+    Adds (person_id, movie_id) star links in one batch.
+    """
+    if _uses_dicts():
+        for person_id, movie_id in links:
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        return
+
+    pairs = [(graph.person_index[person_id], graph.movie_index[movie_id])
+             for person_id, movie_id in links]
+    graph.update_links(added=pairs)
+    if components is not None:
+        # Everyone in a movie shares a component, so joining each new
+        # star to any one other co-star keeps the components right
+        for person, movie in pairs:
+            for co_star in graph.stars_of(movie):
+                if co_star != person:
+                    components.link(person, co_star)
+                    break
+
+
+def _split(links):
+    """
+    Patches the components after (person, movie) index links were
+    removed from the CompactGraph.
+    """
+    if components is None:
+        return
+    # A removed link can only have cut its person off from the movie's
+    # remaining stars, any one of whom stands for them all
+    people = []
+    for person, movie in links:
+        people.append(person)
+        for co_star in graph.stars_of(movie):
+            people.append(co_star)
+            break
+    components.split(people)
+
+
+def _edited():
+    """
+    Records an edit made through this module rather than to the CSV
+    files, after which the data is no longer theirs to snapshot.
+    """
+    if data_source is not None:
+        data_source["edited"] = True
+    _changed()
+
+
+def _changed():
+    """
+    Drops whatever was derived from the data after an edit.
+    """
+    global graph
+
+    distance_index.cache_clear()
+    name_index.cache_clear()
+    if _uses_dicts():
+        # A graph packed from the dicts is stale; it is packed again,
+        # and the components recomputed, when next needed
+        graph = None
+
+
+def iter_neighbors(person_id):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with a
+    given person, one at a time. A pair may repeat if the two share
+    more than one movie.
+    """
+    if graph is not None:
+        person = graph.person_index[person_id]
+        movie_ids = graph.movie_ids
+        person_ids = graph.person_ids
+        for movie, neighbor in graph.neighbors(person):
+            yield movie_ids[movie], person_ids[neighbor]
+        return
+    for movie_id in people[person_id]["movies"]:
+        for neighbor in movies[movie_id]["stars"]:
+            yield movie_id, neighbor
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    return set(iter_neighbors(person_id))
 
 
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
 import csv
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from util import Node, IndexedQueueFrontier, path_to
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -84,49 +85,53 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `stats` (a util.SearchStats) is given, the nodes expanded and
+    time taken are added to it.
+
     If no possible path, returns None.
     """
+    if source == target:
+        return []
+
+    started = time.perf_counter()
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
- 
+
     # Initialize an empty explored set
     explored = set()
-    iteration = 0
-    # Keep looping until path is found
-    while frontier.empty() is False:
-        
-        iteration += 1
-        
-        # Choose a node from the frontier
-        node = frontier.remove()
- 
-        # If not goal, add to explored
-        explored.add(node.state)
- 
-        for movie, person in neighbors_for_person(node.state):
-            # If node is the goal, then we have a solution
-            if person == target:
-                #  print(iteration)
-                path = [(movie, person)]
-                # Follow parent nodes to find solution
-                while node.parent != None:
-                    pair = (node.action, node.state)
-                    path.insert(0, pair)
-                    node = node.parent
-                return(path)
-
-            if person not in explored:
-                child = Node(person, node, movie)
-                frontier.add(child)
-            
-        
-
+    expanded = 0
+    try:
+        # Keep looping until path is found
+        while not frontier.empty():
+
+            # Choose a node from the frontier
+            node = frontier.remove()
+            expanded += 1
+
+            # If not goal, add to explored
+            explored.add(node.state)
+
+            for movie, person in iter_neighbors(node.state):
+                # If node is the goal, then we have a solution
+                if person == target:
+                    return path_to(Node(person, node, movie))
+
+                if (not frontier.contains_state(person)
+                        and person not in explored):
+                    child = Node(person, node, movie)
+                    frontier.add(child)
+        return None
+    finally:
+        if stats is not None:
+            stats.searches += 1
+            stats.nodes_expanded += expanded
+            stats.seconds += time.perf_counter() - started
 
 
 def person_id_for_name(name):
@@ -155,17 +160,22 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def iter_neighbors(person_id):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with a
+    given person, one at a time.
+    """
+    for movie_id in people[person_id]["movies"]:
+        for neighbor in movies[movie_id]["stars"]:
+            yield movie_id, neighbor
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    return set(iter_neighbors(person_id))
 
 
 if __name__ == "__main__":
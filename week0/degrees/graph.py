@@ -0,0 +1,583 @@
+from array import array
+from bisect import bisect_left
+from functools import cached_property
+
+from tables import AppendableColumn
+
+
+def _packed(name):
+    """
+    A CSR array of CompactGraph, with any link edits made since it was
+    last read packed into it first.
+    """
+    private = "_" + name
+
+    def get(self):
+        if self._person_rows or self._movie_rows:
+            self._flush()
+        return getattr(self, private)
+
+    def set(self, value):
+        setattr(self, private, value)
+
+    return property(get, set)
+
+
+class CompactGraph():
+    """
+    Integer-indexed, array-backed star graph.
+
+    People and movies are numbered 0..n-1 in load order. The movies of
+    person p are person_movies[person_offsets[p]:person_offsets[p + 1]]
+    and the stars of movie m are
+    movie_people[movie_offsets[m]:movie_offsets[m + 1]] (CSR layout),
+    so a search walks flat arrays of machine ints instead of nested
+    dicts of sets of strings.
+
+    Any int sequence works for the arrays, including memoryviews over a
+    snapshot file. Names, births, titles and years are optional and only
+    carried when the graph has to stand in for `people` and `movies`;
+    `name_order` lists person indexes sorted by lower-case name.
+
+    The graph can be edited in place (see add_person, add_movie,
+    update_links); removed people keep their index but lose their links.
+    Edited rows are kept aside until the arrays are next read, so a run
+    of edits costs one repack.
+    """
+
+    person_offsets = _packed("person_offsets")
+    person_movies = _packed("person_movies")
+    movie_offsets = _packed("movie_offsets")
+    movie_people = _packed("movie_people")
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_people, person_names=None,
+                 person_births=None, movie_titles=None, movie_years=None,
+                 name_order=None):
+        # Rows edited since the arrays were packed: index -> set of links
+        self._person_rows = {}
+        self._movie_rows = {}
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        if name_order is not None:
+            self.name_order = name_order
+        self.removed_people = set()
+        self.mutable = False
+
+    @cached_property
+    def name_order(self):
+        """Person indexes sorted by lower-case name."""
+        person_names = self.person_names
+        return array("i", sorted(
+            range(len(person_names)), key=lambda i: person_names[i].lower()
+        ))
+
+    @cached_property
+    def person_index(self):
+        """Maps person ids to person indexes."""
+        return {person_id: i for i, person_id in enumerate(self.person_ids)}
+
+    @cached_property
+    def movie_index(self):
+        """Maps movie ids to movie indexes."""
+        return {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Builds a graph from the `people` and `movies` dicts of degrees.py.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        person_offsets, person_movies = cls._pack(
+            (people[person_id]["movies"] for person_id in person_ids),
+            movie_index
+        )
+        movie_offsets, movie_people = cls._pack(
+            (movies[movie_id]["stars"] for movie_id in movie_ids),
+            person_index
+        )
+        graph = cls(person_ids, movie_ids, person_offsets, person_movies,
+                    movie_offsets, movie_people)
+        graph.person_index = person_index
+        graph.movie_index = movie_index
+        return graph
+
+    @staticmethod
+    def _pack(rows, index):
+        """
+        Packs an iterable of id collections into CSR offsets and targets.
+        """
+        offsets = array("i", [0])
+        targets = array("i")
+        for row in rows:
+            targets.extend(sorted(index[key] for key in row))
+            offsets.append(len(targets))
+        return offsets, targets
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def people_named(self, name):
+        """
+        Returns the set of person ids whose name matches `name`,
+        ignoring case. Requires `person_names`.
+        """
+        name = name.lower()
+        person_names = self.person_names
+        order = self.name_order
+        key = lambda person: person_names[person].lower()
+        found = set()
+        i = bisect_left(order, name, key=key)
+        while i < len(order) and key(order[i]) == name:
+            if order[i] not in self.removed_people:
+                found.add(self.person_ids[order[i]])
+            i += 1
+        return found
+
+    def add_person(self, person_id, name=None, birth=None):
+        """
+        Adds a person with no movies and returns their index.
+        """
+        self._make_mutable()
+        person = len(self.person_ids)
+        self.person_ids.append(person_id)
+        if self.person_names is not None:
+            self.person_names.append(name)
+            self.person_births.append(birth)
+        self._person_offsets.append(self._person_offsets[-1])
+        self.person_index[person_id] = person
+        self.__dict__.pop("name_order", None)
+        return person
+
+    def add_movie(self, movie_id, title=None, year=None):
+        """
+        Adds a movie with no stars and returns its index.
+        """
+        self._make_mutable()
+        movie = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        if self.movie_titles is not None:
+            self.movie_titles.append(title)
+            self.movie_years.append(year)
+        self._movie_offsets.append(self._movie_offsets[-1])
+        self.movie_index[movie_id] = movie
+        return movie
+
+    def remove_person(self, person_id):
+        """
+        Removes a person and all of their star links, and returns the
+        (person, movie) index links removed.
+        """
+        person = self.person_index.pop(person_id)
+        links = [(person, movie) for movie in self.movies_of(person)]
+        self.update_links(removed=links)
+        self.removed_people.add(person)
+        return links
+
+    def remove_movie(self, movie_id):
+        """
+        Removes a movie and all of its star links, and returns the
+        (person, movie) index links removed.
+        """
+        movie = self.movie_index.pop(movie_id)
+        links = [(person, movie) for person in self.stars_of(movie)]
+        self.update_links(removed=links)
+        return links
+
+    def update_links(self, added=(), removed=()):
+        """
+        Adds and removes (person, movie) index links. The arrays are
+        repacked when next read, once for all the edits made until then.
+        """
+        self._make_mutable()
+        person_rows = self._person_rows
+        movie_rows = self._movie_rows
+        for links, keep in ((removed, False), (added, True)):
+            for person, movie in links:
+                if person not in person_rows:
+                    person_rows[person] = set(self.movies_of(person))
+                if movie not in movie_rows:
+                    movie_rows[movie] = set(self.stars_of(movie))
+                if keep:
+                    person_rows[person].add(movie)
+                    movie_rows[movie].add(person)
+                else:
+                    person_rows[person].discard(movie)
+                    movie_rows[movie].discard(person)
+
+    def _flush(self):
+        """
+        Packs the rows edited by update_links into the arrays.
+        """
+        person_rows, self._person_rows = self._person_rows, {}
+        movie_rows, self._movie_rows = self._movie_rows, {}
+        self._person_offsets, self._person_movies = repack(
+            self._person_offsets, self._person_movies, person_rows)
+        self._movie_offsets, self._movie_people = repack(
+            self._movie_offsets, self._movie_people, movie_rows)
+
+    def _make_mutable(self):
+        """
+        Swaps read-only columns and memory-mapped arrays (e.g. from a
+        snapshot) for in-memory copies that can grow.
+        """
+        if self.mutable:
+            return
+        for name in ("person_ids", "movie_ids", "person_names",
+                     "person_births", "movie_titles", "movie_years"):
+            column = getattr(self, name)
+            if column is not None and not isinstance(column, list):
+                setattr(self, name, AppendableColumn(column))
+        for name in ("_person_offsets", "_person_movies", "_movie_offsets",
+                     "_movie_people"):
+            column = getattr(self, name)
+            if not isinstance(column, array):
+                copy = array("i")
+                copy.frombytes(column.cast("B"))
+                setattr(self, name, copy)
+        self.mutable = True
+
+    def movies_of(self, person):
+        """Returns the movie indexes of person index `person`."""
+        if person in self._person_rows:
+            return sorted(self._person_rows[person])
+        offsets = self._person_offsets
+        return self._person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """Returns the person indexes of movie index `movie`."""
+        if movie in self._movie_rows:
+            return sorted(self._movie_rows[movie])
+        offsets = self._movie_offsets
+        return self._movie_people[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred with
+        person index `person`.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[j]
+
+    def path_ids(self, steps):
+        """
+        Converts (movie, person) index pairs to (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in steps]
+
+    def shortest_path(self, source, target, bidirectional=True, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect person id `source` to person id `target`.
+        The people expanded are added to `stats`, if given.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if bidirectional:
+            steps = self._bidirectional(source, target, stats)
+        else:
+            steps = self._breadth_first(source, target, stats)
+        return None if steps is None else self.path_ids(steps)
+
+    def shortest_paths(self, source, target, k):
+        """
+        Returns up to `k` shortest lists of (movie_id, person_id) pairs
+        that connect person id `source` to person id `target`, each
+        through a different chain of people, all from one search.
+
+        Returns an empty list if they are not connected.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        layers = self._layers(source, target)
+        if layers is None:
+            return []
+        paths = []
+        for steps in self._chains(source, target, layers):
+            paths.append(self.path_ids(steps))
+            if len(paths) == k:
+                break
+        return paths
+
+    def count_shortest_paths(self, source, target):
+        """
+        Returns how many different chains of people connect person ids
+        `source` and `target` in the fewest degrees.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        layers = self._layers(source, target)
+        if layers is None:
+            return 0
+        counts = {source: 1}
+
+        # Recursion only follows shortest chains, so it is as deep as
+        # the degrees of separation
+        def count(person):
+            if person not in counts:
+                counts[person] = sum(
+                    count(previous)
+                    for _, previous in self._predecessors(person, layers)
+                )
+            return counts[person]
+
+        return count(target)
+
+    def _layers(self, source, target):
+        """
+        Breadth-first search from `source` that stops once `target` is
+        reached, returning the distance of everyone found, or None if
+        `target` cannot be reached.
+        """
+        if source == target:
+            return {source: 0}
+        parents = {source: None}
+        depths = {source: 0}
+        layer = [source]
+        depth = 0
+        while layer:
+            depth += 1
+            layer, meeting = self._expand(layer, parents, (target,))
+            for person in layer:
+                depths[person] = depth
+            if meeting is not None:
+                depths[meeting] = depth
+                return depths
+        return None
+
+    def _predecessors(self, person, layers):
+        """
+        Returns (movie, person) pairs one layer closer to the source,
+        one pair per person, for a person found by _layers.
+        """
+        wanted = layers[person] - 1
+        found = {}
+        for movie, neighbor in self.neighbors(person):
+            if neighbor not in found and layers.get(neighbor) == wanted:
+                found[neighbor] = movie
+        return [(movie, neighbor) for neighbor, movie in found.items()]
+
+    def _chains(self, source, target, layers):
+        """
+        Yields every shortest chain from `source` to `target` as
+        (movie, person) steps, walking back from `target` through
+        predecessors. Every person in `layers` has one, so no branch of
+        the walk is a dead end.
+        """
+        stack = [(target, [])]
+        while stack:
+            person, suffix = stack.pop()
+            if person == source:
+                yield list(reversed(suffix))
+                continue
+            for movie, previous in reversed(self._predecessors(person,
+                                                               layers)):
+                stack.append((previous, suffix + [(movie, person)]))
+
+    def _breadth_first(self, source, target, stats=None):
+        """
+        One-sided breadth-first search over person indexes.
+        """
+        if source == target:
+            return []
+        parents = {source: None}
+        layer = [source]
+        while layer:
+            layer, meeting = self._expand(layer, parents, (target,), stats)
+            if meeting is not None:
+                return self._trace(meeting, parents)
+        return None
+
+    def _bidirectional(self, source, target, stats=None):
+        """
+        Breadth-first search from both ends, always growing the smaller
+        frontier by a whole layer until the two meet.
+        """
+        if source == target:
+            return []
+        forward = {source: None}
+        backward = {target: None}
+        forward_layer = [source]
+        backward_layer = [target]
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = self._expand(
+                    forward_layer, forward, backward, stats)
+            else:
+                backward_layer, meeting = self._expand(
+                    backward_layer, backward, forward, stats)
+            if meeting is not None:
+                steps = self._trace(meeting, forward)
+                person = meeting
+                while backward[person] is not None:
+                    movie, following = backward[person]
+                    steps.append((movie, following))
+                    person = following
+                return steps
+        return None
+
+    def _expand(self, layer, parents, goals, stats=None):
+        """
+        Expands every person in `layer` by one step, recording
+        (movie, previous person) parents.
+
+        Returns the next layer and the first person reached that is in
+        `goals`, or None if no goal was reached.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        next_layer = []
+        for expanded, person in enumerate(layer, 1):
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[j]
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (movie, person)
+                    if neighbor in goals:
+                        if stats is not None:
+                            stats.nodes_expanded += expanded
+                        return next_layer, neighbor
+                    next_layer.append(neighbor)
+        if stats is not None:
+            stats.nodes_expanded += len(layer)
+        return next_layer, None
+
+    @staticmethod
+    def _trace(person, parents):
+        """
+        Follows `parents` from `person` back to the root and returns the
+        (movie, person) steps in root-to-person order.
+        """
+        steps = []
+        while parents[person] is not None:
+            movie, previous = parents[person]
+            steps.append((movie, person))
+            person = previous
+        steps.reverse()
+        return steps
+
+
+class DistanceIndex():
+    """
+    Breadth-first distances and parents from one source over a
+    CompactGraph, so that the shortest path to any target can be read
+    off in O(path length) without searching again.
+    """
+
+    def __init__(self, graph, source):
+        """
+        Runs one breadth-first search from person id `source`.
+        """
+        self.graph = graph
+        self.source = graph.person_index[source]
+        size = len(graph)
+        self.distance = array("i", [-1]) * size
+        self.parent_person = array("i", [-1]) * size
+        self.parent_movie = array("i", [-1]) * size
+        self.reached = 0
+        self._search()
+
+    def _search(self):
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_people = graph.movie_people
+        distance = self.distance
+        parent_person = self.parent_person
+        parent_movie = self.parent_movie
+
+        distance[self.source] = 0
+        layer = [self.source]
+        depth = 0
+        reached = 1
+        while layer:
+            depth += 1
+            next_layer = []
+            for person in layer:
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        neighbor = movie_people[j]
+                        if distance[neighbor] == -1:
+                            distance[neighbor] = depth
+                            parent_person[neighbor] = person
+                            parent_movie[neighbor] = movie
+                            next_layer.append(neighbor)
+            reached += len(next_layer)
+            layer = next_layer
+        self.reached = reached
+
+    def distance_to(self, target):
+        """
+        Returns the degrees of separation to person id `target`,
+        or None if they are not connected to the source.
+        """
+        distance = self.distance[self.graph.person_index[target]]
+        return None if distance == -1 else distance
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs from the
+        source to person id `target`, or None if they are not connected.
+        """
+        person = self.graph.person_index[target]
+        if self.distance[person] == -1:
+            return None
+        steps = []
+        while person != self.source:
+            steps.append((self.parent_movie[person], person))
+            person = self.parent_person[person]
+        steps.reverse()
+        return self.graph.path_ids(steps)
+
+
+def repack(offsets, targets, rows):
+    """
+    Returns CSR offsets and targets with the rows in `rows` (a dict of
+    row -> collection of targets) replaced, copying unchanged runs of
+    rows in bulk.
+    """
+    new_offsets = array("i", [0])
+    new_targets = array("i")
+    cursor = 0
+    for row in sorted(rows):
+        # Unchanged rows before this one, shifted to their new position
+        shift = len(new_targets) - offsets[cursor]
+        new_targets.extend(targets[offsets[cursor]:offsets[row]])
+        new_offsets.extend(offset + shift
+                           for offset in offsets[cursor + 1:row + 1])
+        new_targets.extend(sorted(rows[row]))
+        new_offsets.append(len(new_targets))
+        cursor = row + 1
+    shift = len(new_targets) - offsets[cursor]
+    new_targets.extend(targets[offsets[cursor]:])
+    new_offsets.extend(offset + shift for offset in offsets[cursor + 1:])
+    return new_offsets, new_targets
@@ -0,0 +1,279 @@
+"""
+Streaming, low-memory loader for the degrees CSV files.
+
+Rows are read one at a time and never kept as dicts: person and movie
+ids are interned to integer indexes, names go into a single string
+table, star links are packed straight into CSR arrays, and births,
+titles and years stay on disk until asked for (see tables.CsvColumn).
+
+With more than one worker, people.csv and movies.csv are read
+concurrently and stars.csv is split into byte ranges that are parsed in
+separate processes; their partial edge lists are then merged.
+"""
+
+import csv
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from graph import CompactGraph
+from tables import CsvColumn, StringTableBuilder
+
+
+# Bytes kept from before the end of each file (see tail)
+TAIL_SIZE = 4096
+
+# Id -> index maps used by star-parsing workers (see _set_indexes)
+_person_index = None
+_movie_index = None
+
+
+def load_graph(directory, workers=1):
+    """
+    Loads the CSV files in `directory` into a CompactGraph that carries
+    names, births, titles and years, using up to `workers` processes.
+    """
+    people_path = os.path.join(directory, "people.csv")
+    movies_path = os.path.join(directory, "movies.csv")
+    stars_path = os.path.join(directory, "stars.csv")
+
+    if workers == 1:
+        person_index, person_rows, people_header, names = _read_entities(
+            people_path, "name")
+        movie_index, movie_rows, movies_header, _ = _read_entities(
+            movies_path)
+        _set_indexes(person_index, movie_index)
+        try:
+            edge_people, edge_movies = _read_stars(stars_path)
+        finally:
+            _set_indexes(None, None)
+        person_offsets, person_movies = pack_edges(
+            edge_people, edge_movies, len(person_index))
+        movie_offsets, movie_people = pack_edges(
+            edge_movies, edge_people, len(movie_index))
+    else:
+        context = _context()
+        with ProcessPoolExecutor(2, mp_context=context) as pool:
+            people = pool.submit(_read_entities, people_path, "name")
+            movies = pool.submit(_read_entities, movies_path)
+            person_index, person_rows, people_header, names = people.result()
+            movie_index, movie_rows, movies_header, _ = movies.result()
+
+        # Workers get the id maps once, at start-up (for free under fork)
+        with ProcessPoolExecutor(workers, mp_context=context,
+                                 initializer=_set_indexes,
+                                 initargs=(person_index, movie_index)) as pool:
+            parts = [
+                pool.submit(_read_stars, stars_path, start, end)
+                for start, end in split_lines(stars_path, workers)
+            ]
+            edge_people = array("i")
+            edge_movies = array("i")
+            for part in parts:
+                part_people, part_movies = part.result()
+                edge_people.extend(part_people)
+                edge_movies.extend(part_movies)
+
+            by_person = pool.submit(pack_edges, edge_people, edge_movies,
+                                    len(person_index))
+            by_movie = pool.submit(pack_edges, edge_movies, edge_people,
+                                   len(movie_index))
+            person_offsets, person_movies = by_person.result()
+            movie_offsets, movie_people = by_movie.result()
+
+    graph = CompactGraph(
+        list(person_index), list(movie_index),
+        person_offsets, person_movies, movie_offsets, movie_people,
+        person_names=names,
+        person_births=CsvColumn(people_path, person_rows,
+                                people_header.index("birth")),
+        movie_titles=CsvColumn(movies_path, movie_rows,
+                               movies_header.index("title")),
+        movie_years=CsvColumn(movies_path, movie_rows,
+                              movies_header.index("year"))
+    )
+    graph.person_index = person_index
+    graph.movie_index = movie_index
+    return graph
+
+
+def _read_entities(path, name_column=None):
+    """
+    Reads the ids of a people or movies file, interning them in order.
+
+    Returns the id -> index dict, the byte offset of each kept row, the
+    header, and a StringTable of `name_column` (None if not asked for).
+    """
+    index = {}
+    offsets = array("q")
+    names = StringTableBuilder() if name_column is not None else None
+    with open(path, "rb") as f:
+        rows = _rows(f)
+        _, header = next(rows)
+        id_field = header.index("id")
+        if names is not None:
+            name_field = header.index(name_column)
+        for offset, row in rows:
+            entity_id = row[id_field]
+            if entity_id in index:
+                continue
+            index[entity_id] = len(index)
+            offsets.append(offset)
+            if names is not None:
+                names.append(row[name_field])
+    return index, offsets, header, None if names is None else names.build()
+
+
+def _read_stars(path, start=None, end=None):
+    """
+    Reads the star links in the byte range [start, end) of stars.csv
+    (the whole file by default) as parallel arrays of person and movie
+    indexes, skipping links to unknown ids.
+    """
+    edge_people = array("i")
+    edge_movies = array("i")
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        person_field = header.index("person_id")
+        movie_field = header.index("movie_id")
+        if start is not None:
+            f.seek(start)
+        for offset, row in _rows(f):
+            if end is not None and offset >= end:
+                break
+            try:
+                person = _person_index[row[person_field]]
+                movie = _movie_index[row[movie_field]]
+            except KeyError:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+    return edge_people, edge_movies
+
+
+def split_lines(path, parts):
+    """
+    Splits the data rows of a CSV file into at most `parts` byte ranges
+    (start, end) that begin and end on line boundaries.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        boundaries = [f.tell()]
+        first = f.tell()
+        for i in range(1, parts):
+            f.seek(max(first + (size - first) * i // parts - 1,
+                       boundaries[-1]))
+            f.readline()
+            if f.tell() >= size:
+                break
+            if f.tell() > boundaries[-1]:
+                boundaries.append(f.tell())
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _set_indexes(person_index, movie_index):
+    """
+    Installs the id -> index maps that _read_stars looks links up in.
+    """
+    global _person_index, _movie_index
+    _person_index = person_index
+    _movie_index = movie_index
+
+
+def _context():
+    """
+    Returns a fork context where available, so workers share the
+    parent's memory instead of receiving pickled copies.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _rows(f):
+    """
+    Yields (byte offset, fields) for each CSV record of binary file `f`.
+    """
+    start = [f.tell()]
+
+    def lines():
+        position = start[0]
+        for line in f:
+            start[0] = position
+            position += len(line)
+            yield line.decode("utf-8")
+
+    for row in csv.reader(lines()):
+        yield start[0], row
+
+
+def pack_edges(sources, targets, size):
+    """
+    Packs parallel (source, target) index arrays into CSR offsets and
+    sorted, de-duplicated targets for sources 0..size-1.
+    """
+    # Counting sort of the edges by source
+    offsets = array("i", [0]) * (size + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+    cursor = offsets[:-1]
+    grouped = array("i", [0]) * len(targets)
+    for source, target in zip(sources, targets):
+        grouped[cursor[source]] = target
+        cursor[source] += 1
+    del cursor
+
+    # Sort each row and drop repeated links
+    packed = array("i")
+    packed_offsets = array("i", [0])
+    for i in range(size):
+        row = grouped[offsets[i]:offsets[i + 1]]
+        if len(row) > 1:
+            row = sorted(set(row))
+        packed.extend(row)
+        packed_offsets.append(len(packed))
+    return packed_offsets, packed
+
+
+def memory_usage():
+    """
+    Returns the resident memory of this process in bytes, or the peak
+    resident memory where the current figure is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def rows_after(path, offset):
+    """
+    Yields each CSV record that starts at or after byte `offset` of
+    `path` as a dict keyed by the header, e.g. rows appended since the
+    file was `offset` bytes long.
+    """
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        f.seek(max(offset, f.tell()))
+        for _, row in _rows(f):
+            yield dict(zip(header, row))
+
+
+def tail(path, offset):
+    """
+    Returns the last TAIL_SIZE (or fewer) bytes of `path` before byte
+    `offset`. If they are unchanged when the file has grown, it was most
+    likely appended to rather than rewritten.
+    """
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - TAIL_SIZE))
+        return f.read(offset - f.tell())
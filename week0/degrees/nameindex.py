@@ -0,0 +1,163 @@
+"""
+Prefix and typo-tolerant lookup of people by name.
+
+Names are split into lower-case words. Every distinct word is kept in a
+sorted vocabulary, and the people whose names contain it are stored
+CSR-style in the same order, so the people for all words starting with
+a prefix form one contiguous slice. Typos are handled by looking up
+every variant of a query word within one edit.
+"""
+
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+
+# Prefix slices longer than this are not ranked directly; instead people
+# are scanned from the most to the least prolific (see NameIndex.search)
+SCAN_LIMIT = 5000
+
+# Query words shorter than this must be spelled correctly
+MIN_FUZZY_LENGTH = 4
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+WORD = re.compile(r"\w+")
+
+
+def words(name):
+    """Returns the lower-case words of a name."""
+    return WORD.findall(name.lower())
+
+
+class NameIndex():
+    """
+    Name lookup over people numbered 0..n-1, ranked by film count.
+    """
+
+    def __init__(self, names, film_counts, person_ids):
+        """
+        `names`, `film_counts` and `person_ids` are sequences indexed by
+        person number.
+        """
+        self.names = names
+        self.person_ids = person_ids
+
+        # Word -> people, packed in sorted word order
+        postings = {}
+        for person, name in enumerate(names):
+            for word in set(words(name)):
+                postings.setdefault(word, array("i")).append(person)
+        self.vocabulary = sorted(postings)
+        self.rows = {}
+        self.offsets = array("i", [0])
+        self.people = array("i")
+        for row, word in enumerate(self.vocabulary):
+            self.rows[word] = row
+            self.people.extend(postings.pop(word))
+            self.offsets.append(len(self.people))
+
+        # Most prolific first, for ranking and for scanning short prefixes
+        self.film_counts = array("i", film_counts)
+        self.by_films = array("i", sorted(
+            range(len(names)), key=lambda person: -self.film_counts[person]
+        ))
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` person ids whose name matches `query`,
+        most films first.
+
+        Every word of the query must be a word of the name, except the
+        last, which may be the start of one. If that finds fewer than
+        `limit` people, names within one typo per word are added.
+        """
+        query_words = words(query)
+        if not query_words:
+            return []
+        found = self._prefix_matches(query_words, limit)
+        if len(found) < limit:
+            seen = set(found)
+            for person in self._fuzzy_matches(query_words, limit):
+                if person not in seen and len(found) < limit:
+                    found.append(person)
+                    seen.add(person)
+        return [self.person_ids[person] for person in found]
+
+    def _prefix_matches(self, query_words, limit):
+        *whole, partial = query_words
+        lo = bisect_left(self.vocabulary, partial)
+        hi = bisect_left(self.vocabulary, partial + "\U0010ffff", lo)
+        start = self.offsets[lo]
+        end = self.offsets[hi]
+
+        # Narrow down with the whole words first when they are rarer
+        candidates = None
+        for word in whole:
+            people = self._postings(word)
+            candidates = (set(people) if candidates is None
+                          else candidates.intersection(people))
+
+        if candidates is not None and len(candidates) <= end - start:
+            pool = [person for person in candidates
+                    if any(word.startswith(partial)
+                           for word in words(self.names[person]))]
+        elif end - start <= SCAN_LIMIT:
+            pool = set(self.people[start:end])
+            if candidates is not None:
+                pool &= candidates
+        else:
+            # A short prefix matches a large share of everyone, so the
+            # best-known matches turn up early in a scan by film count
+            pool = []
+            for person in self.by_films:
+                if self._matches(person, whole, partial):
+                    pool.append(person)
+                    if len(pool) == limit:
+                        break
+        return heapq.nlargest(limit, pool,
+                              key=lambda person: self.film_counts[person])
+
+    def _matches(self, person, whole, partial):
+        name_words = words(self.names[person])
+        return (all(word in name_words for word in whole)
+                and any(word.startswith(partial) for word in name_words))
+
+    def _fuzzy_matches(self, query_words, limit):
+        candidates = None
+        for word in query_words:
+            people = set()
+            for variant in self._variants(word):
+                people.update(self._postings(variant))
+            candidates = (people if candidates is None
+                          else candidates & people)
+            if not candidates:
+                return []
+        return heapq.nlargest(limit, candidates,
+                              key=lambda person: self.film_counts[person])
+
+    def _variants(self, word):
+        """
+        Returns the vocabulary words within one edit of `word`.
+        """
+        if len(word) < MIN_FUZZY_LENGTH:
+            return [word] if word in self.rows else []
+        splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+        edits = {word}
+        for left, right in splits:
+            if right:
+                edits.add(left + right[1:])
+            if len(right) > 1:
+                edits.add(left + right[1] + right[0] + right[2:])
+            for letter in LETTERS:
+                edits.add(left + letter + right)
+                if right:
+                    edits.add(left + letter + right[1:])
+        return [edit for edit in edits if edit in self.rows]
+
+    def _postings(self, word):
+        """Returns the people whose names contain `word`."""
+        row = self.rows.get(word)
+        if row is None:
+            return ()
+        return self.people[self.offsets[row]:self.offsets[row + 1]]
@@ -0,0 +1,173 @@
+"""
+Binary snapshot of a loaded degrees dataset.
+
+A snapshot holds a CompactGraph together with the names, births, titles
+and years it stands in for. It is stamped with the size and mtime of the
+CSV files it was built from, and is memory-mapped on load so that its
+arrays are used in place rather than parsed.
+
+Layout: MAGIC, an 8-byte header length, a JSON header, then 8-byte
+aligned sections. Int sections are native int32 arrays; string tables
+are an int64 offsets section followed by a UTF-8 blob section.
+"""
+
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from graph import CompactGraph
+from tables import StringTable
+
+MAGIC = b"DEGSNAP1"
+FILENAME = ".degrees.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+INT_SECTIONS = ["person_offsets", "person_movies", "movie_offsets",
+                "movie_people", "name_order"]
+STRING_SECTIONS = ["person_ids", "person_names", "person_births",
+                   "movie_ids", "movie_titles", "movie_years"]
+
+
+def path_for(directory):
+    """Returns the snapshot path for a data directory."""
+    return os.path.join(directory, FILENAME)
+
+
+def stamps(directory):
+    """
+    Returns the [size, mtime_ns] of each source CSV in `directory`.
+    """
+    result = {}
+    for name in SOURCES:
+        info = os.stat(os.path.join(directory, name))
+        result[name] = [info.st_size, info.st_mtime_ns]
+    return result
+
+
+def save(directory, graph):
+    """
+    Writes a snapshot of `graph`, which must carry names, births, titles
+    and years (as loaded by loader.load_graph), into `directory`.
+    Removed people cannot be stored, so a graph with any is refused.
+    """
+    if graph.removed_people:
+        raise Exception("cannot snapshot a graph with removed people")
+    sections = {
+        "person_offsets": graph.person_offsets,
+        "person_movies": graph.person_movies,
+        "movie_offsets": graph.movie_offsets,
+        "movie_people": graph.movie_people,
+        "name_order": graph.name_order,
+        "person_ids": graph.person_ids,
+        "person_names": graph.person_names,
+        "person_births": graph.person_births,
+        "movie_ids": graph.movie_ids,
+        "movie_titles": graph.movie_titles,
+        "movie_years": graph.movie_years,
+    }
+
+    # Lay out every section as raw bytes
+    chunks = []
+    for name in INT_SECTIONS:
+        chunks.append((name, array("i", sections[name]).tobytes()))
+    for name in STRING_SECTIONS:
+        offsets, blob = StringTable.pack(sections[name])
+        chunks.append((name + ".offsets", offsets.tobytes()))
+        chunks.append((name + ".blob", blob))
+
+    layout = {}
+    position = 0
+    for name, data in chunks:
+        layout[name] = [position, len(data)]
+        position += _padded(len(data))
+    header = json.dumps({
+        "stamps": stamps(directory),
+        "byteorder": sys.byteorder,
+        "sections": layout,
+    }).encode("utf-8")
+
+    # Write to a temporary file and swap it in so readers never see
+    # a partial snapshot
+    path = path_for(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        f.write(bytes(_padded(f.tell()) - f.tell()))
+        for name, data in chunks:
+            f.write(data)
+            f.write(bytes(_padded(len(data)) - len(data)))
+    os.replace(temporary, path)
+
+
+def load(directory):
+    """
+    Memory-maps the snapshot in `directory` and returns its CompactGraph.
+
+    Returns None if there is no snapshot, or it is stale, truncated or
+    otherwise unreadable.
+    """
+    try:
+        f = open(path_for(directory), "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        length = int.from_bytes(f.read(8), "little")
+        try:
+            header = json.loads(f.read(length))
+            if (header["byteorder"] != sys.byteorder
+                    or header["stamps"] != stamps(directory)):
+                return None
+            layout = header["sections"]
+            base = _padded(len(MAGIC) + 8 + length)
+            end = base + max(start + size for start, size in layout.values())
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        # A snapshot cut short (e.g. by a crash mid-copy) is unreadable
+        if os.fstat(f.fileno()).st_size < end:
+            return None
+        data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def section(name):
+        start, size = layout[name]
+        return data[base + start:base + start + size]
+
+    try:
+        fields = {}
+        for name in INT_SECTIONS:
+            fields[name] = section(name).cast("i")
+        for name in STRING_SECTIONS:
+            fields[name] = StringTable(section(name + ".offsets").cast("q"),
+                                       section(name + ".blob"))
+        if not _consistent(fields):
+            return None
+    except (KeyError, TypeError, ValueError):
+        return None
+    return CompactGraph(**fields)
+
+
+def _consistent(fields):
+    """
+    Returns whether the sections of a snapshot agree on the number of
+    people and movies.
+    """
+    people = len(fields["person_ids"])
+    movies = len(fields["movie_ids"])
+    return (len(fields["person_offsets"]) == people + 1
+            and len(fields["movie_offsets"]) == movies + 1
+            and len(fields["name_order"]) == people
+            and len(fields["person_names"]) == people
+            and len(fields["person_births"]) == people
+            and len(fields["movie_titles"]) == movies
+            and len(fields["movie_years"]) == movies)
+
+
+def _padded(size):
+    """Rounds `size` up to a multiple of 8."""
+    return (size + 7) // 8 * 8
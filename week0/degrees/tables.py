@@ -0,0 +1,128 @@
+"""
+Compact read-only columns of strings used by CompactGraph.
+"""
+
+import csv
+from array import array
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob plus offsets.
+    Strings are decoded on access.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @classmethod
+    def pack(cls, strings):
+        """Returns the (offsets, blob) encoding of `strings`."""
+        builder = StringTableBuilder()
+        for string in strings:
+            builder.append(string)
+        return builder.offsets, bytes(builder.blob)
+
+
+class StringTableBuilder():
+    """
+    Accumulates strings one at a time into a StringTable.
+    """
+
+    def __init__(self):
+        self.offsets = array("q", [0])
+        self.blob = bytearray()
+
+    def append(self, string):
+        self.blob += string.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def build(self):
+        return StringTable(self.offsets, bytes(self.blob))
+
+
+class CsvColumn():
+    """
+    One column of a CSV file, read from disk on demand.
+
+    `offsets` holds the byte offset of each data row, so single values
+    are fetched with one seek instead of being kept in memory.
+    """
+
+    def __init__(self, path, offsets, field):
+        self.path = path
+        self.offsets = offsets
+        self.field = field
+        self.file = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        if self.file is None:
+            self.file = open(self.path, "rb")
+        self.file.seek(self.offsets[i])
+        line = self.file.readline().decode("utf-8")
+        return next(csv.reader([line]))[self.field]
+
+    def __iter__(self):
+        # Read sequentially rather than seeking once per row; offsets
+        # are increasing, so keep only the lines that start a known row
+        offsets = self.offsets
+        k = 0
+        position = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if k == len(offsets):
+                    return
+                if position == offsets[k]:
+                    yield next(csv.reader([line.decode("utf-8")]))[self.field]
+                    k += 1
+                position += len(line)
+
+    def __getstate__(self):
+        # Open files do not pickle; reopen lazily after unpickling
+        state = self.__dict__.copy()
+        state["file"] = None
+        return state
+
+
+class AppendableColumn():
+    """
+    A read-only column (e.g. a StringTable or CsvColumn) with values
+    appended after it in memory.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.extra = []
+
+    def __len__(self):
+        return len(self.base) + len(self.extra)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i < len(self.base):
+            return self.base[i]
+        return self.extra[i - len(self.base)]
+
+    def __iter__(self):
+        yield from self.base
+        yield from self.extra
+
+    def append(self, value):
+        self.extra.append(value)
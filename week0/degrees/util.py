@@ -1,3 +1,7 @@
+import heapq
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +40,98 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class IndexedStackFrontier():
+    """
+    Stack frontier backed by a deque, with a hash index of the states
+    it holds so that add, remove and contains_state are all O(1).
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        # Maps state -> number of nodes in the frontier with that state
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self._pop()
+        self._forget(node.state)
+        return node
+
+    def _pop(self):
+        return self.frontier.pop()
+
+    def _forget(self, state):
+        count = self.states[state]
+        if count == 1:
+            del self.states[state]
+        else:
+            self.states[state] = count - 1
+
+
+class IndexedQueueFrontier(IndexedStackFrontier):
+
+    def _pop(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier(IndexedStackFrontier):
+    """
+    Frontier for weighted searches: remove returns the node with the
+    lowest priority, ties broken by insertion order.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.frontier = []
+        self.counter = 0
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, self.counter, node))
+        self.counter += 1
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def _pop(self):
+        return heapq.heappop(self.frontier)[2]
+
+
+class SearchStats():
+    """
+    Work done by one or more searches: how many searches ran, how many
+    nodes they expanded and how many seconds of wall time they took.
+    """
+
+    def __init__(self):
+        self.searches = 0
+        self.nodes_expanded = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (f"SearchStats(searches={self.searches}, "
+                f"nodes_expanded={self.nodes_expanded}, "
+                f"seconds={self.seconds:.6f})")
+
+
+def path_to(node):
+    """
+    Returns the (action, state) pairs leading from the root of `node`'s
+    parent chain to `node`.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+    return path
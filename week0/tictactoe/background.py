@@ -0,0 +1,70 @@
+"""
+Computes an AI move on a background thread, so a game loop can keep
+drawing and handling events while the search runs.
+"""
+
+import threading
+import time
+
+
+class Cancelled(Exception):
+    """Raised inside a search to abandon it."""
+
+
+class BackgroundMove():
+    """
+    One call of `search(board, interrupt=...)`, such as tictactoe.minimax
+    or mnk.Game.minimax, running on a daemon thread. The game loop polls
+    done() each frame and calls cancel() if the game is reset.
+    """
+
+    def __init__(self, search, board):
+        self.started = time.monotonic()
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._move = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run,
+                                        args=(search, board), daemon=True)
+        self._thread.start()
+
+    def _run(self, search, board):
+        try:
+            self._move = search(board, interrupt=self._interrupt)
+        except Cancelled:
+            pass
+        except Exception as error:
+            self._error = error
+        finally:
+            self._finished.set()
+
+    def _interrupt(self):
+        if self._cancelled.is_set():
+            raise Cancelled
+
+    def done(self):
+        """
+        Returns True once the move is ready, without waiting for it.
+        """
+        return self._finished.is_set() and not self._cancelled.is_set()
+
+    def elapsed(self):
+        """Returns the seconds since the search started."""
+        return time.monotonic() - self.started
+
+    def result(self):
+        """
+        Returns the move found, re-raising any error from the search.
+        """
+        if not self.done():
+            raise Exception("Move is not ready")
+        if self._error is not None:
+            raise self._error
+        return self._move
+
+    def cancel(self):
+        """
+        Asks the search to stop at its next check; its move, if any, is
+        thrown away.
+        """
+        self._cancelled.set()
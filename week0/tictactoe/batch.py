@@ -0,0 +1,91 @@
+"""
+Batch evaluation of tictactoe positions.
+
+Boards are reduced to their canonical form (see bitboard.canonical), so
+positions that differ only by a rotation or reflection, or that repeat,
+are searched once. The searches share one transposition table, and with
+more than one worker they are spread over a process pool.
+"""
+
+import multiprocessing
+from array import array
+
+import bitboard
+import tictactoe
+from transposition import EXACT
+
+# Canonical positions sent to a pool worker at a time
+CHUNK_SIZE = 64
+
+
+def evaluate(boards, workers=1, table=tictactoe.TABLE):
+    """
+    Returns (actions, values) for a sequence of boards, as two arrays
+    parallel to `boards`: the cell index (3 * i + j) of an optimal
+    action, or -1 if the game is over, and the minimax value (1 if X
+    wins with best play, -1 if O does, 0 for a draw).
+    """
+    positions = [bitboard.canonical_symmetry(*bitboard.from_board(board))
+                 for board in boards]
+    keys = sorted({key for key, _ in positions})
+    solved = dict(zip(keys, _solve_all(keys, workers, table)))
+
+    actions = array("b")
+    values = array("b")
+    for key, symmetry in positions:
+        action, value = solved[key]
+        if action != -1:
+            # Map the canonical position's action back onto this board
+            action = bitboard.PERMUTATIONS[symmetry].index(action)
+        actions.append(action)
+        values.append(value)
+    return actions, values
+
+
+def _solve_all(keys, workers, table):
+    """
+    Returns (action, value) for each canonical key, in order.
+    """
+    if workers == 1 or len(keys) <= CHUNK_SIZE:
+        return _solve(keys, table)
+
+    chunks = [keys[i:i + CHUNK_SIZE] for i in range(0, len(keys), CHUNK_SIZE)]
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "fork" if "fork" in methods else None
+    )
+    # Each worker searches with its own copy of `table` (or none, if it
+    # is None); their exact results are added back to ours
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(table,)) as pool:
+        results = [result for chunk in pool.map(_solve_chunk, chunks)
+                   for result in chunk]
+    if table is not None:
+        for key, (action, value) in zip(keys, results):
+            if action != -1:
+                table.store(key, value, EXACT)
+    return results
+
+
+# The table a pool worker searches with, set by _init_worker
+_worker_table = None
+
+
+def _init_worker(table):
+    global _worker_table
+    _worker_table = table
+
+
+def _solve_chunk(keys):
+    return _solve(keys, _worker_table)
+
+
+def _solve(keys, table):
+    results = []
+    for key in keys:
+        x, o = key >> 9, key & bitboard.FULL
+        if bitboard.terminal(x, o):
+            results.append((-1, bitboard.utility(x, o)))
+        else:
+            results.append(tictactoe.best_move(x, o, table=table))
+    return results
@@ -0,0 +1,114 @@
+"""
+Benchmarks the tictactoe search modes.
+
+First compares them on the empty board: positions visited, time taken,
+how much of the full tree alpha-beta prunes, and what a transposition
+table saves on a first and a repeated call. Then runs minimax on every
+reachable position in each mode and reports throughput, the work
+counted by SearchStats, and what counting it costs.
+
+Usage: python benchmark.py [--full]
+"""
+
+import argparse
+import time
+
+import bitboard
+import book
+import tictactoe as ttt
+from transposition import TranspositionTable
+
+
+def measure(board, **options):
+    """
+    Returns the action, positions visited and seconds taken by one
+    minimax call.
+    """
+    stats = ttt.SearchStats()
+    started = time.perf_counter()
+    action = ttt.minimax(board, stats=stats, book=False, **options)
+    return action, stats.nodes, time.perf_counter() - started
+
+
+def empty_board():
+    board = ttt.initial_state()
+    full_action, full_nodes, full_seconds = measure(board, alpha_beta=False,
+                                                    table=None)
+    action, nodes, seconds = measure(board, alpha_beta=True, table=None)
+    print(f"minimax:    {full_action} after {full_nodes} positions "
+          f"in {full_seconds * 1000:.1f} ms")
+    print(f"alpha-beta: {action} after {nodes} positions "
+          f"in {seconds * 1000:.1f} ms")
+    print(f"pruned {1 - nodes / full_nodes:.2%} of the tree")
+
+    table = TranspositionTable()
+    for run in ("cold", "warm"):
+        action, nodes, seconds = measure(board, table=table)
+        print(f"table, {run}: {action} after {nodes} positions "
+              f"in {seconds * 1000:.1f} ms ({len(table)} entries)")
+
+
+def every_position(boards, options, stats=None):
+    """
+    Returns the seconds taken to run minimax once on each board. A
+    `table` option is called to get a fresh table for the run.
+    """
+    options = dict(options)
+    if callable(options.get("table")):
+        options["table"] = options["table"]()
+    started = time.perf_counter()
+    for board in boards:
+        ttt.minimax(board, stats=stats, **options)
+    return time.perf_counter() - started
+
+
+def all_positions(full):
+    boards = [bitboard.to_board(x, o) for x, o in sorted(book.reachable())
+              if not bitboard.terminal(x, o)]
+    print(f"\n{len(boards)} reachable positions to move in")
+
+    modes = {
+        "alpha-beta": {"book": False, "table": None},
+        "alpha-beta + table": {"book": False, "table": TranspositionTable},
+    }
+    if book.load() is not None:
+        modes["opening book"] = {"book": True}
+    else:
+        print("(no opening book; run python book.py to include it)")
+    if full:
+        modes["minimax"] = {"book": False, "table": None,
+                            "alpha_beta": False}
+
+    for name, options in modes.items():
+        seconds = every_position(boards, options)
+        stats = ttt.SearchStats()
+        counted = every_position(boards, options, stats)
+        summary = stats.summary()
+        print(f"{name}:")
+        print(f"  {len(boards) / seconds:,.0f} positions/s, "
+              f"{stats.nodes / seconds:,.0f} nodes/s")
+        print(f"  {summary['nodes_per_call']:.1f} nodes, "
+              f"{summary['mean_seconds'] * 1e6:.1f} us per call "
+              f"(max {stats.max_seconds * 1000:.2f} ms)")
+        print(f"  {stats.terminal_checks} terminal checks, "
+              f"{stats.terminals} terminal positions")
+        if stats.cache_lookups:
+            print(f"  {stats.cache_hits} of {stats.cache_lookups} table "
+                  f"lookups hit ({summary['cache_hit_rate']:.1%})")
+        if stats.book_hits:
+            print(f"  {stats.book_hits} answered from the book")
+        print(f"  counting costs {counted / seconds - 1:+.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tictactoe.")
+    parser.add_argument("--full", action="store_true",
+                        help="include full minimax on every position "
+                        "(slow)")
+    args = parser.parse_args()
+    empty_board()
+    all_positions(args.full)
+
+
+if __name__ == "__main__":
+    main()
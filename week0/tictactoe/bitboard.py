@@ -0,0 +1,180 @@
+"""
+Bitboard Tic Tac Toe engine.
+
+A position is two 9-bit integers, one per player, where bit 3 * i + j is
+set if that player holds cell (i, j). Whether a set of cells contains a
+line is precomputed for all 512 of them, so winner, terminal and result
+are a handful of bit operations.
+"""
+
+X = "X"
+O = "O"
+
+FULL = 0b111111111
+
+# Cell index -> (i, j) and back
+CELLS = [(i, j) for i in range(3) for j in range(3)]
+CELL_INDEX = {cell: index for index, cell in enumerate(CELLS)}
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+)
+
+# WINS[cells] is True if the cell set `cells` contains a full line
+WINS = tuple(
+    any(cells & mask == mask for mask in WIN_MASKS) for cells in range(512)
+)
+
+# Cells in the order most likely to be good moves: center, corners, edges
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# POPCOUNT[cells] is the number of cells in the set
+POPCOUNT = tuple(bin(cells).count("1") for cells in range(512))
+
+
+def _symmetries():
+    """
+    Returns the 8 rotations and reflections of the board, each as a list
+    mapping cell index to the index it moves to.
+    """
+    maps = []
+    for flip in (False, True):
+        for turns in range(4):
+            permutation = []
+            for i, j in CELLS:
+                if flip:
+                    j = 2 - j
+                for _ in range(turns):
+                    i, j = j, 2 - i
+                permutation.append(3 * i + j)
+            maps.append(permutation)
+    return maps
+
+
+# PERMUTATIONS[s][index] is where symmetry s moves cell `index`
+PERMUTATIONS = tuple(tuple(permutation) for permutation in _symmetries())
+
+# SYMMETRIES[s][cells] is the cell set `cells` under symmetry s
+SYMMETRIES = tuple(
+    tuple(sum(1 << permutation[index] for index in range(9)
+              if cells >> index & 1) for cells in range(512))
+    for permutation in PERMUTATIONS
+)
+
+
+def key(x, o):
+    """
+    Returns a single integer for an (x, o) position.
+    """
+    return x << 9 | o
+
+
+def canonical(x, o):
+    """
+    Returns the smallest key of the position under any rotation or
+    reflection, so symmetric positions share one key.
+    """
+    return min(table[x] << 9 | table[o] for table in SYMMETRIES)
+
+
+def canonical_symmetry(x, o):
+    """
+    Returns (key, s): the canonical key of the position and a symmetry s
+    that maps the position onto it.
+    """
+    return min((table[x] << 9 | table[o], s)
+               for s, table in enumerate(SYMMETRIES))
+
+
+def player(x, o):
+    """
+    Returns the player who has the next turn.
+    """
+    return X if POPCOUNT[x] == POPCOUNT[o] else O
+
+
+def actions(x, o):
+    """
+    Returns the indexes of the empty cells.
+    """
+    empty = FULL & ~(x | o)
+    return [index for index in range(9) if empty >> index & 1]
+
+
+def ordered_actions(x, o):
+    """
+    Returns the indexes of the empty cells, center first, then corners,
+    then edges, so alpha-beta search meets strong moves early.
+    """
+    taken = x | o
+    return [index for index in ORDER if not taken >> index & 1]
+
+
+def result(x, o, index):
+    """
+    Returns the (x, o) position after the player to move takes cell
+    `index`.
+    """
+    bit = 1 << index
+    if (x | o) & bit:
+        raise ValueError("cell already taken")
+    if POPCOUNT[x] == POPCOUNT[o]:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
+
+
+def from_board(board):
+    """
+    Returns the (x, o) position of a list-of-lists board.
+    """
+    x = o = 0
+    for index, (i, j) in enumerate(CELLS):
+        if board[i][j] == X:
+            x |= 1 << index
+        elif board[i][j] == O:
+            o |= 1 << index
+    return x, o
+
+
+def to_board(x, o, empty=None):
+    """
+    Returns the list-of-lists board of an (x, o) position.
+    """
+    board = [[empty] * 3 for _ in range(3)]
+    for index, (i, j) in enumerate(CELLS):
+        if x >> index & 1:
+            board[i][j] = X
+        elif o >> index & 1:
+            board[i][j] = O
+    return board
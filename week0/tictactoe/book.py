@@ -0,0 +1,183 @@
+"""
+Perfect-play opening book for tictactoe.
+
+Every position reachable from the empty board is solved once and stored
+in a 3^9-byte file, one byte per board read as a base-3 number (empty 0,
+X 1, O 2 for each cell). A byte holds (value + 1) << 4 | action, where
+action is the index of an optimal cell, or NO_ACTION if the game is
+over; boards that cannot be reached are UNREACHABLE.
+
+Usage: python book.py [--verify]
+"""
+
+import argparse
+import os
+
+import bitboard
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+SIZE = 3 ** 9
+NO_ACTION = 0x0F
+UNREACHABLE = 0xFF
+
+# TERNARY[cells] is the base-3 number with a 1 for each cell in the set
+TERNARY = tuple(sum(3 ** index for index in range(9) if cells >> index & 1)
+                for cells in range(512))
+
+# Loaded on first lookup; False once we know there is no book file
+_entries = None
+
+
+def index(x, o):
+    """
+    Returns the book index of an (x, o) position.
+    """
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def reachable():
+    """
+    Returns every (x, o) position reachable from the empty board.
+    """
+    found = {(0, 0)}
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if bitboard.terminal(x, o):
+            continue
+        for cell in bitboard.actions(x, o):
+            position = bitboard.result(x, o, cell)
+            if position not in found:
+                found.add(position)
+                stack.append(position)
+    return found
+
+
+def build(path=PATH):
+    """
+    Solves every reachable position and writes the book to `path`.
+    Returns the number of positions stored.
+    """
+    # tictactoe imports this module, so import it only when building
+    import tictactoe
+    from transposition import TranspositionTable
+
+    table = TranspositionTable()
+    entries = bytearray([UNREACHABLE]) * SIZE
+    positions = reachable()
+    for x, o in positions:
+        if bitboard.terminal(x, o):
+            action, value = NO_ACTION, bitboard.utility(x, o)
+        else:
+            action, value = tictactoe.best_move(x, o, table=table)
+        entries[index(x, o)] = (value + 1) << 4 | action
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(entries)
+    os.replace(temporary, path)
+    clear()
+    return len(positions)
+
+
+def load(path=PATH):
+    """
+    Returns the book in `path` as bytes, or None if it has not been built.
+    """
+    try:
+        with open(path, "rb") as f:
+            entries = f.read()
+    except FileNotFoundError:
+        return None
+    if len(entries) != SIZE:
+        raise Exception(f"{path} is not an opening book")
+    return entries
+
+
+def lookup(x, o):
+    """
+    Returns (action, value) for a position from the book file, loading
+    it on first use. The action is None if the game is over. Returns
+    None if there is no book or the position is not reachable.
+    """
+    global _entries
+    if _entries is None:
+        _entries = load() or False
+    if not _entries:
+        return None
+    entry = _entries[index(x, o)]
+    if entry == UNREACHABLE:
+        return None
+    action = entry & 0x0F
+    return (None if action == NO_ACTION else action), (entry >> 4) - 1
+
+
+def clear():
+    """Forgets the loaded book, so the next lookup reads the file again."""
+    global _entries
+    _entries = None
+
+
+def verify(path=PATH):
+    """
+    Checks every reachable position in the book at `path` against an
+    independent full minimax search. Returns a list of problems found.
+    """
+    entries = load(path)
+    if entries is None:
+        return [f"no book at {path}"]
+
+    values = {}
+
+    def solve(x, o):
+        position = (x, o)
+        if position not in values:
+            if bitboard.terminal(x, o):
+                values[position] = bitboard.utility(x, o)
+            else:
+                scores = [solve(*bitboard.result(x, o, cell))
+                          for cell in bitboard.actions(x, o)]
+                values[position] = (max(scores)
+                                    if bitboard.player(x, o) == bitboard.X
+                                    else min(scores))
+        return values[position]
+
+    problems = []
+    positions = reachable()
+    for x, o in positions:
+        entry = entries[index(x, o)]
+        if entry == UNREACHABLE:
+            problems.append(f"missing {(x, o)}")
+            continue
+        action, value = entry & 0x0F, (entry >> 4) - 1
+        if value != solve(x, o):
+            problems.append(f"wrong value for {(x, o)}")
+        elif bitboard.terminal(x, o):
+            if action != NO_ACTION:
+                problems.append(f"action in finished game {(x, o)}")
+        elif (action > 8 or (x | o) >> action & 1
+              or solve(*bitboard.result(x, o, action)) != value):
+            problems.append(f"suboptimal action for {(x, o)}")
+    if sum(entry != UNREACHABLE for entry in entries) != len(positions):
+        problems.append("entries for unreachable positions")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book.")
+    parser.add_argument("--verify", action="store_true",
+                        help="check an existing book instead of building")
+    args = parser.parse_args()
+
+    if not args.verify:
+        print(f"Stored {build()} positions in {PATH}")
+    problems = verify()
+    for problem in problems:
+        print(problem)
+    print("Book matches search" if not problems else
+          f"{len(problems)} problems found")
+
+
+if __name__ == "__main__":
+    main()
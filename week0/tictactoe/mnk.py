@@ -0,0 +1,318 @@
+"""
+m,n,k-game player: Tic Tac Toe on an m x n board, where k in a row wins.
+
+Boards are lists of lists of X, O and EMPTY, as in tictactoe.py. Wins
+are detected incrementally by walking out from the last move. Larger
+boards cannot be searched to the end, so minimax runs iterative
+deepening alpha-beta search against a time budget and scores the
+positions where it stops with a heuristic evaluation.
+"""
+
+import math
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Boards with at most this many cells consider every empty cell as a
+# move; larger ones only consider cells next to a mark
+FULL_WIDTH_CELLS = 16
+
+# Score of a won position; quicker wins score higher
+WIN = 1000000
+
+# Window scans (see Game.evaluate) allowed between checks of the clock;
+# bigger boards scan more windows per node, so check after fewer nodes
+CLOCK_WORK = 8192
+
+
+class Timeout(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class SearchStats():
+    """
+    Work done by one or more searches: positions visited and the
+    deepest iteration completed.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.depth = 0
+
+    def __repr__(self):
+        return f"SearchStats(nodes={self.nodes}, depth={self.depth})"
+
+
+class Game():
+    """
+    An m x n board (m rows, n columns) where k in a row wins.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if k > max(m, n):
+            raise Exception("k in a row does not fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+
+        # Every run of k cells in a line, as flat cell indexes
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append([(i + di * step) * n
+                                             + j + dj * step
+                                             for step in range(k)])
+
+        # Nodes searched between checks of the clock
+        self.clock_interval = max(1, CLOCK_WORK // max(1, len(self.windows)))
+
+        # Heuristic weight of a window holding `count` marks of one
+        # player; a full window is a win
+        self.weights = [0] + [4 ** count for count in range(1, k)] + [WIN]
+
+        # Cells nearest the center first, a good default move order
+        center_i, center_j = (m - 1) / 2, (n - 1) / 2
+        self.order = sorted(
+            range(self.size),
+            key=lambda cell: (abs(cell // n - center_i)
+                              + abs(cell % n - center_j))
+        )
+
+        # Cells next to each cell, for picking moves on large boards
+        self.neighbors = [
+            [ni * n + nj
+             for ni in range(max(0, i - 1), min(m, i + 2))
+             for nj in range(max(0, j - 1), min(n, j + 2))
+             if (ni, nj) != (i, j)]
+            for i in range(m) for j in range(n)
+        ]
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        marks = [cell for row in board for cell in row]
+        return X if marks.count(X) == marks.count(O) else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise Exception("Invalid action")
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def wins_at(self, board, action):
+        """
+        Returns whether the mark at `action` completes k in a row.
+        """
+        return self._wins_at(self._flatten(board), action[0] * self.n
+                             + action[1])
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = self._flatten(board)
+        for window in self.windows:
+            mark = cells[window[0]]
+            if mark is not EMPTY and all(cells[cell] == mark
+                                         for cell in window):
+                return mark
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def minimax(self, board, budget=1.0, max_depth=None, stats=None,
+                interrupt=None):
+        """
+        Returns the best action found for the current player within
+        `budget` seconds of search, or None if the game is over.
+        """
+        return self.search(board, budget, max_depth, stats, interrupt)[0]
+
+    def search(self, board, budget=1.0, max_depth=None, stats=None,
+               interrupt=None):
+        """
+        Returns (action, score, depth): the best action found for the
+        current player within `budget` seconds, its score for X (±WIN
+        less the moves to a forced win, otherwise a heuristic estimate)
+        and the depth of the last search completed.
+
+        Searches one move deep, then two, and so on until the time runs
+        out, the game is solved, or `max_depth` is reached. Each
+        iteration tries the previous iteration's best move first.
+
+        `interrupt`, if given, is called now and then during the search
+        and may raise an exception to abandon it.
+        """
+        if self.terminal(board):
+            return None, self.utility(board) * WIN, 0
+
+        cells = self._flatten(board)
+        filled = sum(cell != EMPTY for cell in cells)
+        color = 1 if cells.count(X) == cells.count(O) else -1
+        remaining = self.size - filled
+        if max_depth is None or max_depth > remaining:
+            max_depth = remaining
+
+        self._deadline = time.perf_counter() + budget
+        self._nodes = 0
+        self._interrupt = interrupt
+        moves = self._moves(cells)
+        best_move, best_score, completed = moves[0], 0, 0
+        try:
+            for depth in range(1, max_depth + 1):
+                score, move = self._root(cells, filled, color, depth, moves)
+                best_move, best_score, completed = move, score, depth
+                moves.remove(move)
+                moves.insert(0, move)
+                if stats is not None:
+                    stats.depth = max(stats.depth, depth)
+                if abs(score) >= WIN - self.size:
+                    break
+        except Timeout:
+            pass
+        finally:
+            if stats is not None:
+                stats.nodes += self._nodes
+        return divmod(best_move, self.n), color * best_score, completed
+
+    def _root(self, cells, filled, color, depth, moves):
+        mark = X if color == 1 else O
+        alpha, beta = -math.inf, math.inf
+        best_move = moves[0]
+        for move in moves:
+            cells[move] = mark
+            try:
+                score = -self._negamax(cells, move, filled + 1, -color,
+                                       depth - 1, -beta, -alpha)
+            finally:
+                cells[move] = EMPTY
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def _negamax(self, cells, last, filled, color, depth, alpha, beta):
+        """
+        Returns the score of a position for the player `color` (1 for X,
+        -1 for O) to move, given the move `last` just played.
+        """
+        self._nodes += 1
+        if self._nodes % self.clock_interval == 0:
+            if self._interrupt is not None:
+                self._interrupt()
+            if time.perf_counter() > self._deadline:
+                raise Timeout
+        if self._wins_at(cells, last):
+            # The opponent just won; sooner losses score lower
+            return -(WIN - filled)
+        if filled == self.size:
+            return 0
+        if depth == 0:
+            return color * self.evaluate(cells)
+
+        mark = X if color == 1 else O
+        v = -math.inf
+        for move in self._moves(cells):
+            cells[move] = mark
+            try:
+                score = -self._negamax(cells, move, filled + 1, -color,
+                                       depth - 1, -beta, -alpha)
+            finally:
+                cells[move] = EMPTY
+            if score > v:
+                v = score
+            if v >= beta:
+                break
+            alpha = max(alpha, v)
+        return v
+
+    def evaluate(self, cells):
+        """
+        Returns a heuristic score for X of a flat board: every window of
+        k cells still open to one player counts for them, more so the
+        more of it they hold, and a completed one counts as WIN.
+        """
+        weights = self.weights
+        score = 0
+        for window in self.windows:
+            x_count = o_count = 0
+            for cell in window:
+                mark = cells[cell]
+                if mark == X:
+                    x_count += 1
+                elif mark == O:
+                    o_count += 1
+            if not o_count:
+                score += weights[x_count]
+            elif not x_count:
+                score -= weights[o_count]
+        return score
+
+    def _moves(self, cells):
+        """
+        Returns the empty cells worth trying, center first.
+        """
+        if self.size <= FULL_WIDTH_CELLS:
+            return [cell for cell in self.order if cells[cell] == EMPTY]
+        moves = [cell for cell in self.order if cells[cell] == EMPTY
+                 and any(cells[near] != EMPTY
+                         for near in self.neighbors[cell])]
+        return moves or [cell for cell in self.order if cells[cell] == EMPTY]
+
+    def _wins_at(self, cells, cell):
+        mark = cells[cell]
+        if mark is EMPTY:
+            return False
+        m, n, k = self.m, self.n, self.k
+        i, j = divmod(cell, n)
+        for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1
+            for sign in (1, -1):
+                ni, nj = i + sign * di, j + sign * dj
+                while 0 <= ni < m and 0 <= nj < n and \
+                        cells[ni * n + nj] == mark:
+                    count += 1
+                    ni += sign * di
+                    nj += sign * dj
+            if count >= k:
+                return True
+        return False
+
+    def _flatten(self, board):
+        return [cell for row in board for cell in row]
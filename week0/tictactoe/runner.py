@@ -3,6 +3,7 @@ import sys
 import time
 
 import tictactoe as ttt
+from background import BackgroundMove
 
 pygame.init()
 size = width, height = 600, 400
@@ -19,12 +20,19 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The AI's move in progress, computed off the event loop
+ai_move = None
+
+# Seconds the AI appears to think before moving
+AI_DELAY = 0.5
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            if ai_move is not None:
+                ai_move.cancel()
             sys.exit()
 
     screen.fill(black)
@@ -110,13 +118,11 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = BackgroundMove(ttt.minimax, board)
+            elif ai_move.done() and ai_move.elapsed() >= AI_DELAY:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,20 +133,23 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Start over, abandoning any search in progress
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Reset",
+                                  True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                user = None
+                board = ttt.initial_state()
+                if ai_move is not None:
+                    ai_move.cancel()
+                    ai_move = None
 
     pygame.display.flip()
@@ -2,15 +2,25 @@
 Tic Tac Toe Player
 """
 
-from copy import deepcopy
-from ctypes import util
 import math
-from re import I
+import time
+
+import bitboard
+import book as opening_book
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Boards are lists of lists of X, O and EMPTY, as runner.py expects.
+# Every function converts to the bitboard engine (see bitboard.py) and
+# does its work on two 9-bit integers.
+
+# Alpha-beta results shared by every minimax call; TABLE.save(path) and
+# TABLE.load(path) carry them over to other processes
+TABLE = TranspositionTable()
+
 
 def initial_state():
     """
@@ -25,183 +35,321 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    # Sum over all X's and O's
-    Xsum = 0
-    Osum = 0
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == X:
-                Xsum += 1
-            elif board[i][j] == O:
-                Osum += 1
-    # Subtracting Osum from Xsum should give you the right player
-    # even in starting board.
-    if (Xsum - Osum == 0):
-        return X
-    else:
-        return O
-
+    return bitboard.player(*bitboard.from_board(board))
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    possibles = set()
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == EMPTY:
-                possibles.add((i, j))
-    return possibles
-                
-    
+    return {bitboard.CELLS[index]
+            for index in bitboard.actions(*bitboard.from_board(board))}
+
+
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    #print(action)
-    i = action[0]
-    j = action[1]
-    deepboard = deepcopy(board)
-    
-    if deepboard[i][j] != EMPTY:
+    x, o = bitboard.from_board(board)
+    try:
+        x, o = bitboard.result(x, o, bitboard.CELL_INDEX[action])
+    except (KeyError, ValueError):
         raise NameError("Whoops! Invalid action!")
-    else:
-        deepboard[i][j] = player(board) 
-    
-    return deepboard
-    
+    return bitboard.to_board(x, o, EMPTY)
+
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    # i -> rows j -> columns
-
-    # Undoubtedly not the most efficient way
-    # but I think you can do the horizontal en vertical in one loop
-    for i in range(len(board)):
-        Xcountx = 0
-        Ocountx = 0
-        Xcounty = 0
-        Ocounty = 0
-        for j in range(len(board[i])):
-            if board[i][j] == X:
-                Xcountx += 1
-            elif board[i][j] == O:
-                Ocountx += 1
-            
-            if board[j][i] == X:
-                Xcounty += 1
-            elif board[j][i] == O:
-                Ocounty += 1
-            
-        #print(Xcountx, Ocountx, Xcounty, Ocounty)
-        if (Xcountx == 3) or (Xcounty == 3):
-            return X
-        elif (Ocountx == 3) or (Ocounty == 3):
-            return O
-
-    # Reset counters, maybe a more elegant option is possible? Ugly
-    Xcountx = 0
-    Ocountx = 0
-    Xcounty = 0
-    Ocounty = 0
-
-    # Is there a way to not hardcode the diagonal wins?
-    # When i = j, top left to bottorm right diagonal
-    # When i + j = n of an n x n matrix, bottom left to top right
-    for i in range(len(board)):    
-        for j in range(len(board[i])):
-            if i == j and board[i][j] == X:
-                Xcountx += 1
-            elif i == j and board[i][j] == O:
-                Ocountx += 1
-            
-            if i + j == (len(board)-1) and board[i][j] == X:
-                Xcounty += 1
-            elif i + j == (len(board)-1) and board[i][j] == O:
-                Ocounty += 1
-
-    if (Xcountx == len(board)) or (Xcounty == len(board)):
-        return X
-    elif (Ocountx == len(board)) or (Ocounty == len(board)):
-        return O
-
-    return None
-        
+    return bitboard.winner(*bitboard.from_board(board))
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) == X or winner(board) == O:
-        return True
-    elif actions(board) == set():
-        return True
-    else:
-        return False
+    return bitboard.terminal(*bitboard.from_board(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return bitboard.utility(*bitboard.from_board(board))
+
 
+class SearchStats():
+    """
+    Work done by one or more minimax calls: positions visited, tests for
+    the end of the game and how many found it, transposition table
+    lookups and hits, opening book answers, and time per call.
 
-def minimax(board):
+    Searches only count when given a SearchStats, so they cost nothing
+    extra beyond an `is None` test per position when not measured.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.nodes = 0
+        self.terminal_checks = 0
+        self.terminals = 0
+        self.cache_lookups = 0
+        self.cache_hits = 0
+        self.book_hits = 0
+
+    def record_call(self, seconds):
+        self.calls += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def summary(self):
+        """
+        Returns the counts, with per-call averages and the table hit
+        rate, as a dictionary.
+        """
+        calls = max(self.calls, 1)
+        summary = dict(vars(self))
+        summary["nodes_per_call"] = self.nodes / calls
+        summary["mean_seconds"] = self.seconds / calls
+        summary["cache_hit_rate"] = (self.cache_hits / self.cache_lookups
+                                     if self.cache_lookups else 0.0)
+        return summary
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value}"
+                           for name, value in vars(self).items())
+        return f"SearchStats({fields})"
+
+
+def minimax(board, alpha_beta=True, stats=None, table=TABLE, book=True,
+            interrupt=None):
     """
     Returns the optimal action for the current player on the board.
+
+    If `book` is set and an opening book has been built (see book.py),
+    the action is looked up there. Otherwise the game tree is searched.
+    With `alpha_beta`, branches that cannot change the result are pruned
+    and moves are tried center first, then corners, then edges. Results
+    are kept in the transposition table `table` for later searches, and
+    found there again, unless `table` is None. If `stats` is given, the
+    work done and time taken are added to it (see SearchStats).
+
+    `interrupt`, if given, is called before each move at the top of the
+    search and may raise an exception to abandon it.
     """
-    if player(board) == X:
+    if stats is None:
+        return _minimax(board, alpha_beta, None, table, book, interrupt)
+    started = time.perf_counter()
+    try:
+        return _minimax(board, alpha_beta, stats, table, book, interrupt)
+    finally:
+        stats.record_call(time.perf_counter() - started)
+
+
+def _minimax(board, alpha_beta, stats, table, book, interrupt):
+    x, o = bitboard.from_board(board)
+    if stats is not None:
+        stats.terminal_checks += 1
+    if bitboard.terminal(x, o):
+        return None
+    if book:
+        entry = opening_book.lookup(x, o)
+        if entry is not None:
+            if stats is not None:
+                stats.book_hits += 1
+            return bitboard.CELLS[entry[0]]
+    if alpha_beta:
+        return bitboard.CELLS[best_move(x, o, stats, table, interrupt)[0]]
+    if stats is not None:
+        stats.nodes += 1
+
+    best_action = None
+    if bitboard.player(x, o) == X:
         v = -math.inf
-        for action in actions(board):
-            score = min_value(result(board,action))
+        for index in bitboard.actions(x, o):
+            if interrupt is not None:
+                interrupt()
+            score = _min_value(*bitboard.result(x, o, index), stats)
             if score > v:
                 v = score
-                best_action = action
-        return best_action
-
-    elif player(board) == O:
+                best_action = index
+    else:
         v = math.inf
-        for action in actions(board):
-            score = max_value(result(board, action))
+        for index in bitboard.actions(x, o):
+            if interrupt is not None:
+                interrupt()
+            score = _max_value(*bitboard.result(x, o, index), stats)
             if score < v:
                 v = score
-                best_action = action
-        return best_action
-    
+                best_action = index
+    return bitboard.CELLS[best_action]
+
 
-def max_value(board):
+def best_move(x, o, stats=None, table=TABLE, interrupt=None):
+    """
+    Returns (index, value): an optimal move in a non-terminal (x, o)
+    position and its minimax value, found by alpha-beta search.
+    """
+    if stats is not None:
+        stats.nodes += 1
+    best_action = None
+    alpha, beta = -math.inf, math.inf
+    if bitboard.player(x, o) == X:
+        for index in bitboard.ordered_actions(x, o):
+            if interrupt is not None:
+                interrupt()
+            score = _alpha_beta_min(*bitboard.result(x, o, index),
+                                    alpha, beta, stats, table)
+            if score > alpha:
+                alpha = score
+                best_action = index
+        return best_action, alpha
+    for index in bitboard.ordered_actions(x, o):
+        if interrupt is not None:
+            interrupt()
+        score = _alpha_beta_max(*bitboard.result(x, o, index),
+                                alpha, beta, stats, table)
+        if score < beta:
+            beta = score
+            best_action = index
+    return best_action, beta
+
+
+def max_value(board, stats=None):
     """
     Returns the utility of a board for the maximizing player.
     """
-    if terminal(board):
-        return utility(board)
+    return _max_value(*bitboard.from_board(board), stats)
+
+
+def min_value(board, stats=None):
+    """
+    Returns the utility of a board for the minimizing player
+    """
+    return _min_value(*bitboard.from_board(board), stats)
+
+
+def _max_value(x, o, stats):
+    if stats is not None:
+        stats.nodes += 1
+        stats.terminal_checks += 1
+    if bitboard.terminal(x, o):
+        if stats is not None:
+            stats.terminals += 1
+        return bitboard.utility(x, o)
 
     v = -math.inf
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
-    
+    for index in bitboard.actions(x, o):
+        v = max(v, _min_value(*bitboard.result(x, o, index), stats))
     return v
 
 
-def min_value(board):
+def _min_value(x, o, stats):
+    if stats is not None:
+        stats.nodes += 1
+        stats.terminal_checks += 1
+    if bitboard.terminal(x, o):
+        if stats is not None:
+            stats.terminals += 1
+        return bitboard.utility(x, o)
+
+    v = math.inf
+    for index in bitboard.actions(x, o):
+        v = min(v, _max_value(*bitboard.result(x, o, index), stats))
+    return v
+
+
+def _alpha_beta_max(x, o, alpha, beta, stats, table):
     """
-    Returns the utility of a board for the minimizing player
+    Returns the utility of a position for the maximizing player, or a
+    bound on it outside (alpha, beta), where it no longer matters.
+    """
+    if stats is not None:
+        stats.nodes += 1
+        stats.terminal_checks += 1
+    if bitboard.WINS[o] or (x | o) == bitboard.FULL:
+        if stats is not None:
+            stats.terminals += 1
+        return -1 if bitboard.WINS[o] else 0
+    if table is not None:
+        key = bitboard.canonical(x, o)
+        entry = table.get(key)
+        if stats is not None:
+            stats.cache_lookups += 1
+        if entry is not None and _usable(entry, alpha, beta):
+            if stats is not None:
+                stats.cache_hits += 1
+            return entry[0]
+        window = alpha, beta
+
+    v = -math.inf
+    for index in bitboard.ordered_actions(x, o):
+        v = max(v, _alpha_beta_min(x | 1 << index, o, alpha, beta,
+                                   stats, table))
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+    if table is not None:
+        table.store(key, v, _flag(v, *window))
+    return v
+
+
+def _alpha_beta_min(x, o, alpha, beta, stats, table):
+    """
+    Returns the utility of a position for the minimizing player, or a
+    bound on it outside (alpha, beta), where it no longer matters.
     """
-    if terminal(board):
-        return utility(board)
+    if stats is not None:
+        stats.nodes += 1
+        stats.terminal_checks += 1
+    if bitboard.WINS[x] or (x | o) == bitboard.FULL:
+        if stats is not None:
+            stats.terminals += 1
+        return 1 if bitboard.WINS[x] else 0
+    if table is not None:
+        key = bitboard.canonical(x, o)
+        entry = table.get(key)
+        if stats is not None:
+            stats.cache_lookups += 1
+        if entry is not None and _usable(entry, alpha, beta):
+            if stats is not None:
+                stats.cache_hits += 1
+            return entry[0]
+        window = alpha, beta
 
     v = math.inf
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
-    
-    return v
\ No newline at end of file
+    for index in bitboard.ordered_actions(x, o):
+        v = min(v, _alpha_beta_max(x, o | 1 << index, alpha, beta,
+                                   stats, table))
+        if v <= alpha:
+            break
+        beta = min(beta, v)
+    if table is not None:
+        table.store(key, v, _flag(v, *window))
+    return v
+
+
+def _usable(entry, alpha, beta):
+    """
+    Returns whether a stored result settles a search with window
+    (alpha, beta).
+    """
+    value, flag = entry
+    return (flag == EXACT
+            or (flag == LOWER and value >= beta)
+            or (flag == UPPER and value <= alpha))
+
+
+def _flag(value, alpha, beta):
+    """
+    Returns what a result found with window (alpha, beta) says about
+    the true value.
+    """
+    if value <= alpha:
+        return UPPER
+    if value >= beta:
+        return LOWER
+    return EXACT
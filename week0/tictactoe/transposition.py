@@ -0,0 +1,87 @@
+"""
+Transposition table for tictactoe search.
+
+Results are stored under the canonical key of a position (see
+bitboard.canonical), so a position reached through different move
+orders, or any rotation or reflection of it, is searched only once.
+Tables can be saved to a file and loaded by later runs or other
+processes.
+"""
+
+import os
+import sys
+from array import array
+
+MAGIC = b"TTTABLE1"
+
+# What a stored value means, since alpha-beta cut-offs only bound it
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable():
+    """
+    Mapping of canonical position key -> (value, flag), where flag says
+    whether value is the exact minimax value or a lower or upper bound.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """Returns the (value, flag) stored for a key, or None."""
+        return self.entries.get(key)
+
+    def store(self, key, value, flag):
+        """
+        Records a search result. Exact values are never replaced by
+        bounds.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry[1] != EXACT:
+            self.entries[key] = (value, flag)
+
+    def clear(self):
+        self.entries.clear()
+
+    def save(self, path):
+        """
+        Writes the table to `path`, replacing it in one step so that
+        concurrent readers never see a partial file.
+        """
+        packed = array("I", (key << 4 | (value + 1) << 2 | flag
+                             for key, (value, flag) in self.entries.items()))
+        if sys.byteorder == "big":
+            packed.byteswap()
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            packed.tofile(f)
+        os.replace(temporary, path)
+
+    def load(self, path):
+        """
+        Adds the entries saved in `path` to the table. Returns the number
+        of entries read, or 0 if there is no such file.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        if data[:len(MAGIC)] != MAGIC:
+            raise Exception(f"{path} is not a transposition table")
+        packed = array("I")
+        packed.frombytes(data[len(MAGIC):])
+        if sys.byteorder == "big":
+            packed.byteswap()
+        for word in packed:
+            self.store(word >> 4, (word >> 2 & 3) - 1, word & 3)
+        return len(packed)
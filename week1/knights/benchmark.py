@@ -0,0 +1,78 @@
+"""
+Benchmarks evaluating the knowledge bases in puzzle.py by walking the
+Sentence tree against running the compiled function (Sentence.compile),
+then times answering every puzzle with each model checking method.
+
+Usage: python benchmark.py [repeat]
+"""
+
+import itertools
+import sys
+import time
+
+from logic import model_check
+from puzzle import (AKnave, AKnight, BKnave, BKnight, CKnave, CKnight,
+                    knowledge0, knowledge1, knowledge2, knowledge3)
+
+PUZZLES = [("Puzzle 0", knowledge0), ("Puzzle 1", knowledge1),
+           ("Puzzle 2", knowledge2), ("Puzzle 3", knowledge3)]
+
+SYMBOLS = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+
+METHODS = ["enumerate", "compiled", "truth_table", "cdcl"]
+
+
+def timed(function, repeat):
+    """Returns the mean seconds taken by `repeat` calls of `function`."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def evaluation(knowledge, repeat):
+    """
+    Returns seconds per model for tree-walking and for compiled
+    evaluation of `knowledge` in all of its models.
+    """
+    names = sorted(knowledge.symbols())
+    values = list(itertools.product((False, True), repeat=len(names)))
+    models = [dict(zip(names, model)) for model in values]
+    compiled = knowledge.compile(names)
+
+    def walk():
+        for model in models:
+            knowledge.evaluate(model)
+
+    def run():
+        for model in values:
+            compiled(model)
+
+    return (timed(walk, repeat) / len(models),
+            timed(run, repeat) / len(models))
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print("Evaluating each knowledge base in one model:")
+    for puzzle, knowledge in PUZZLES:
+        walk, run = evaluation(knowledge, repeat)
+        print(f"    {puzzle}: tree {walk * 1e6:.2f} us, "
+              f"compiled {run * 1e6:.2f} us ({walk / run:.1f}x)")
+
+    print("Answering every puzzle:")
+    answers = {}
+    for method in METHODS:
+        def solve():
+            return [[model_check(knowledge, symbol, method=method)
+                     for symbol in SYMBOLS] for _, knowledge in PUZZLES]
+        answers[method] = solve()
+        seconds = timed(solve, max(1, repeat // 10))
+        print(f"    {method}: {seconds * 1000:.2f} ms")
+    if any(result != answers["enumerate"] for result in answers.values()):
+        sys.exit("Methods disagree")
+
+
+if __name__ == "__main__":
+    main()
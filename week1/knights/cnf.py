@@ -0,0 +1,419 @@
+"""
+Conjunctive normal form and a SAT solver for logic.py sentences.
+
+Sentences are converted to clauses over integer literals: symbol number
+v is the literal v, its negation -v. Every connective inside a sentence
+gets a fresh variable defined to be equivalent to it (the Tseitin
+transformation), so the clauses grow linearly with the sentence rather
+than exponentially as with distributing Or over And.
+
+The solver is DPLL with conflict-driven clause learning: unit
+propagation over two watched literals per clause, learning a clause at
+the first unique implication point of each conflict, backjumping, and
+branching on the variables most involved in recent conflicts.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Activity added to variables in a conflict grows by this factor per
+# conflict, so that recent conflicts count for more
+ACTIVITY_GROWTH = 1 / 0.95
+
+# Conflicts in the shortest run between restarts; runs follow the Luby
+# sequence 1, 1, 2, 1, 1, 2, 4, ... times this
+RESTART_INTERVAL = 100
+
+# Learnt clauses kept before the longest half are dropped at a restart,
+# as a share of the original clauses (at least MIN_LEARNT); the limit
+# grows by LEARNT_GROWTH each time
+LEARNT_SHARE = 0.5
+MIN_LEARNT = 500
+LEARNT_GROWTH = 1.1
+
+
+class CNF():
+    """
+    A set of clauses built up from sentences, with the variable number
+    of each symbol.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+        self._literals = {}
+        self._true = None
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        """Returns the variable number of the symbol called `name`."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def add(self, sentence):
+        """
+        Adds clauses requiring `sentence` to be true.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, And):
+            self.clauses.append([-self.literal(conjunct)
+                                 for conjunct in sentence.operand.conjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses
+        that define any new variables it needs.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        # Subtrees shared within a sentence are defined once
+        key = id(sentence)
+        if key in self._literals:
+            return self._literals[key][0]
+        if isinstance(sentence, And):
+            literal = self._define_and(
+                [self.literal(conjunct) for conjunct in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            literal = -self._define_and(
+                [-self.literal(disjunct) for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            literal = -self._define_and([self.literal(sentence.antecedent),
+                                         -self.literal(sentence.consequent)])
+        elif isinstance(sentence, Biconditional):
+            literal = self._define_iff(self.literal(sentence.left),
+                                       self.literal(sentence.right))
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+        # Keep the sentence alive so that its id is not reused
+        self._literals[key] = (literal, sentence)
+        return literal
+
+    def _define_and(self, literals):
+        if not literals:
+            return self.true()
+        if len(literals) == 1:
+            return literals[0]
+        v = self.new_variable()
+        for literal in literals:
+            self.clauses.append([-v, literal])
+        self.clauses.append([v] + [-literal for literal in literals])
+        return v
+
+    def _define_iff(self, left, right):
+        v = self.new_variable()
+        self.clauses.extend([
+            [-v, -left, right], [-v, left, -right],
+            [v, left, right], [v, -left, -right],
+        ])
+        return v
+
+    def true(self):
+        """Returns a literal that is always true."""
+        if self._true is None:
+            self._true = self.new_variable()
+            self.clauses.append([self._true])
+        return self._true
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of `sentence`, as a dictionary of symbol name to
+    truth value, or None if it has no model.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    assignment = solve(cnf.clauses, cnf.count)
+    if assignment is None:
+        return None
+    return {name: assignment[v] for name, v in cnf.variables.items()}
+
+
+def entails(knowledge, query):
+    """
+    Returns whether `knowledge` entails `query`, that is, whether
+    knowledge ∧ ¬query is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return solve(cnf.clauses, cnf.count) is None
+
+
+def solve(clauses, count):
+    """
+    Returns an assignment satisfying every clause, as a list indexed by
+    variable number (1..count) of truth values, or None if there is none.
+    """
+    return Solver(clauses, count).solve()
+
+
+def luby(i):
+    """
+    Returns the i-th term (from 0) of the Luby sequence 1, 1, 2, 1, 1,
+    2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        power -= 1
+        i %= size
+    return 2 ** power
+
+
+class Solver():
+    """
+    CDCL solver state. truth[l] is 1 if literal l is true, -1 if it is
+    false and 0 if unassigned; the list has 2 * count + 1 entries, so
+    negative literals index it from the end.
+    """
+
+    def __init__(self, clauses, count):
+        self.count = count
+        self.truth = [0] * (2 * count + 1)
+        self.level = [0] * (count + 1)
+        self.reason = [None] * (count + 1)
+        self.activity = [0.0] * (count + 1)
+        self.phase = [-1] * (count + 1)
+        self.increment = 1.0
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.watches = {}
+        self.learnts = []
+        self.unsatisfiable = False
+
+        for clause in clauses:
+            clause = list(dict.fromkeys(clause))
+            if any(-literal in clause for literal in clause):
+                continue
+            if not clause:
+                self.unsatisfiable = True
+            elif len(clause) == 1:
+                if not self._enqueue(clause[0], None):
+                    self.unsatisfiable = True
+            else:
+                self._watch(clause)
+        self.learnt_limit = max(MIN_LEARNT, LEARNT_SHARE * len(clauses))
+
+    def _watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def _enqueue(self, literal, reason):
+        """
+        Makes `literal` true, implied by clause `reason` (None for a
+        decision). Returns False if it is already false.
+        """
+        truth = self.truth[literal]
+        if truth:
+            return truth > 0
+        self.truth[literal] = 1
+        self.truth[-literal] = -1
+        v = abs(literal)
+        self.level[v] = len(self.trail_limits)
+        self.reason[v] = reason
+        self.trail.append(literal)
+        return True
+
+    def _propagate(self):
+        """
+        Makes every literal forced by unit clauses true. Returns a
+        clause with every literal false, or None.
+        """
+        truth = self.truth
+        trail = self.trail
+        watches = self.watches
+        level = len(self.trail_limits)
+        while self.head < len(trail):
+            false_literal = -trail[self.head]
+            self.head += 1
+            watching = watches.get(false_literal)
+            if not watching:
+                continue
+            kept = []
+            for i, clause in enumerate(watching):
+                # Keep the false watched literal at position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                if truth[first] > 0:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if truth[literal] >= 0:
+                        clause[1], clause[k] = literal, false_literal
+                        watches.setdefault(literal, []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if truth[first] < 0:
+                        kept.extend(watching[i + 1:])
+                        watches[false_literal] = kept
+                        return clause
+                    # The clause is unit: first must be true
+                    truth[first] = 1
+                    truth[-first] = -1
+                    v = abs(first)
+                    self.level[v] = level
+                    self.reason[v] = clause
+                    trail.append(first)
+            watches[false_literal] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Returns (learnt clause, level to jump back to) for a conflict.
+        The clause's first literal is the one it will make true.
+        """
+        level = len(self.trail_limits)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        literal = None
+        clause = conflict
+        index = len(self.trail) - 1
+        while True:
+            for other in clause:
+                v = abs(other)
+                if other == literal or v in seen or self.level[v] == 0:
+                    continue
+                seen.add(v)
+                self._bump(v)
+                if self.level[v] == level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+
+            # Walk back along the trail to the next literal to resolve on
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+        learnt[0] = -literal
+
+        # Drop literals implied by the rest of the clause
+        learnt = [learnt[0]] + [
+            other for other in learnt[1:]
+            if self.reason[abs(other)] is None
+            or any(abs(implied) not in seen and self.level[abs(implied)] > 0
+                   for implied in self.reason[abs(other)][1:])
+        ]
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal from the highest remaining level second
+        second = max(range(1, len(learnt)),
+                     key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[second] = learnt[second], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def _bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def _backjump(self, level):
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        truth = self.truth
+        for literal in self.trail[start:]:
+            v = abs(literal)
+            self.phase[v] = truth[v]
+            truth[literal] = truth[-literal] = 0
+            self.reason[v] = None
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = len(self.trail)
+
+    def _forget(self):
+        """
+        Drops the longer half of the learnt clauses. Only called at
+        level 0, where no remaining assignment depends on them.
+        """
+        self.learnts.sort(key=len)
+        keep = len(self.learnts) // 2
+        dropped = {id(clause) for clause in self.learnts[keep:]}
+        del self.learnts[keep:]
+        for literal, watching in self.watches.items():
+            self.watches[literal] = [clause for clause in watching
+                                     if id(clause) not in dropped]
+        self.learnt_limit *= LEARNT_GROWTH
+
+    def _decide(self):
+        """
+        Returns the unassigned variable with the highest activity, or
+        None if every variable is assigned.
+        """
+        best = None
+        best_activity = -1.0
+        truth = self.truth
+        for v in range(1, self.count + 1):
+            if not truth[v] and self.activity[v] > best_activity:
+                best = v
+                best_activity = self.activity[v]
+        return best
+
+    def solve(self):
+        if self.unsatisfiable:
+            return None
+        restarts = 0
+        conflicts = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                if not self.trail_limits:
+                    return None
+                conflicts += 1
+                learnt, level = self._analyze(conflict)
+                self._backjump(level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._watch(learnt)
+                    self.learnts.append(learnt)
+                    self._enqueue(learnt[0], learnt)
+                self.increment *= ACTIVITY_GROWTH
+                continue
+
+            if conflicts >= luby(restarts) * RESTART_INTERVAL:
+                # Start the search over, keeping what has been learnt
+                restarts += 1
+                conflicts = 0
+                self._backjump(0)
+                if len(self.learnts) > self.learnt_limit:
+                    self._forget()
+
+            v = self._decide()
+            if v is None:
+                return [self.truth[v] > 0 for v in range(self.count + 1)]
+            self.trail_limits.append(len(self.trail))
+            self._enqueue(v * self.phase[v], None)
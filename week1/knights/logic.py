@@ -7,6 +7,15 @@ class Sentence():
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_bits(self, bits, mask):
+        """
+        Evaluates the logical sentence in many models at once. `bits`
+        maps each symbol to an integer whose bit m is its value in model
+        m, and `mask` has a bit set for every model. Returns an integer
+        whose bit m is the sentence's value in model m.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -15,6 +24,27 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def source(self, index):
+        """
+        Returns a Python expression for the sentence, where the value of
+        symbol `name` is v[index[name]].
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols=None):
+        """
+        Compiles the sentence into a function of one argument, a
+        sequence of truth values indexed like `symbols` (a list of
+        symbol names, by default sorted), that evaluates the sentence.
+        """
+        if symbols is None:
+            symbols = sorted(self.symbols())
+        index = {name: i for i, name in enumerate(symbols)}
+        missing = self.symbols() - index.keys()
+        if missing:
+            raise Exception(f"variable {min(missing)} not in symbols")
+        return eval(f"lambda v: bool({self.source(index)})")
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -62,12 +92,21 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_bits(self, bits, mask):
+        try:
+            return bits[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
     def formula(self):
         return self.name
 
     def symbols(self):
         return {self.name}
 
+    def source(self, index):
+        return f"v[{index[self.name]}]"
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -86,12 +125,18 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_bits(self, bits, mask):
+        return mask ^ self.operand.evaluate_bits(bits, mask)
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
         return self.operand.symbols()
 
+    def source(self, index):
+        return f"(not {self.operand.source(index)})"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -120,6 +165,14 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_bits(self, bits, mask):
+        result = mask
+        for conjunct in self.conjuncts:
+            result &= conjunct.evaluate_bits(bits, mask)
+            if not result:
+                break
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -129,6 +182,12 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def source(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(conjunct.source(index)
+                                  for conjunct in self.conjuncts) + ")"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -151,6 +210,14 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_bits(self, bits, mask):
+        result = 0
+        for disjunct in self.disjuncts:
+            result |= disjunct.evaluate_bits(bits, mask)
+            if result == mask:
+                break
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -160,6 +227,12 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def source(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(disjunct.source(index)
+                                 for disjunct in self.disjuncts) + ")"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -183,6 +256,10 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_bits(self, bits, mask):
+        return ((mask ^ self.antecedent.evaluate_bits(bits, mask))
+                | self.consequent.evaluate_bits(bits, mask))
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
@@ -191,6 +268,10 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def source(self, index):
+        return (f"(not {self.antecedent.source(index)} "
+                f"or {self.consequent.source(index)})")
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -216,6 +297,10 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_bits(self, bits, mask):
+        return mask ^ (self.left.evaluate_bits(bits, mask)
+                       ^ self.right.evaluate_bits(bits, mask))
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
@@ -224,9 +309,32 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def source(self, index):
+        return (f"(bool({self.left.source(index)}) "
+                f"== bool({self.right.source(index)}))")
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    The "enumerate" method checks every model of the symbols;
+    "compiled" does the same with both sentences compiled to functions
+    (see Sentence.compile); "truth_table" checks them all at once, as
+    bits of Python integers (see truth_table_check); "cdcl" converts
+    to clauses and tests knowledge ∧ ¬query for unsatisfiability with
+    the SAT solver in cnf.py.
+    """
+    if method == "compiled":
+        return compiled_check(knowledge, query)
+    if method == "truth_table":
+        return truth_table_check(knowledge, query)
+    if method == "cdcl":
+        # cnf.py builds on the classes in this module
+        from cnf import entails
+        return entails(knowledge, query)
+    if method != "enumerate":
+        raise Exception(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -261,3 +369,44 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def truth_table_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by evaluating both in all 2^n
+    models of their n symbols at once.
+
+    Model m gives symbol i the value of bit i of m, so each symbol's
+    column of the truth table is an integer of 2^n bits, and each
+    connective is one bitwise operation on whole columns (see
+    Sentence.evaluate_bits). Entailment holds if no model makes the
+    knowledge true and the query false.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    models = 1 << len(symbols)
+    mask = (1 << models) - 1
+    bits = {}
+    for i, symbol in enumerate(symbols):
+        # 2^i zeros then 2^i ones, repeated across all the models
+        column = ((1 << (1 << i)) - 1) << (1 << i)
+        length = 1 << (i + 1)
+        while length < models:
+            column |= column << length
+            length *= 2
+        bits[symbol] = column
+    knowledge_bits = knowledge.evaluate_bits(bits, mask)
+    return not knowledge_bits & (mask ^ query.evaluate_bits(bits, mask))
+
+
+def compiled_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by running compiled versions
+    of both (see Sentence.compile) on every model.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge_holds = knowledge.compile(symbols)
+    query_holds = query.compile(symbols)
+    return all(query_holds(model)
+               for model in itertools.product((False, True),
+                                              repeat=len(symbols))
+               if knowledge_holds(model))